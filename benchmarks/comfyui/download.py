@@ -0,0 +1,130 @@
+"""
+Benchmark of the per-image download overhead of the ComfyUI client. A local
+aiohttp server stands in for the /view endpoint of ComfyUI. Images are
+downloaded with a new aiohttp session per request, as the module-level
+get_image used to do and kept below as the reference, and with the shared
+session of ComfyUIClient. Reports, as JSON, the median time per image and
+the number of TCP connections the server accepted.
+
+Run from the repository root:
+    poetry run python benchmarks/comfyui/download.py --images 200
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+import aiohttp
+from aiohttp import web
+from bot.image_gen import ComfyUIClient
+
+HOST = "127.0.0.1"
+
+
+class ViewServer:
+    """
+    Serves the same image for every /view request and counts the TCP
+    connections it accepted.
+    """
+
+    def __init__(self, image_bytes):
+        self.body = os.urandom(image_bytes)
+        self.peers = set()
+        self.app = web.Application()
+        self.app.add_routes([web.get("/view", self.view)])
+
+    async def view(self, request):
+        self.peers.add(request.transport.get_extra_info("peername"))
+        return web.Response(body=self.body, content_type="image/png")
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, HOST, 0).start()
+        return f"{HOST}:{self.runner.addresses[0][1]}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+async def reference_get_image(server_address, filename, subfolder, type):
+    url = f"http://{server_address}/view"
+    params = {"filename": filename, "subfolder": subfolder, "type": type}
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url, params=params) as response:
+            response.raise_for_status()
+            return await response.read()
+
+
+async def time_downloads(get_image, num_images, concurrency):
+    # Seconds per image, with up to `concurrency` downloads at once
+    slots = asyncio.Semaphore(concurrency)
+    times = []
+
+    async def download(idx):
+        async with slots:
+            start = time.perf_counter()
+            await get_image(f"img_{idx}.png", "", "output")
+            times.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(download(idx) for idx in range(num_images)))
+    return float(np.median(times)), time.perf_counter() - start
+
+
+async def run(args):
+    report = {
+        "images": args.images,
+        "image_bytes": args.image_bytes,
+        "concurrency": args.concurrency,
+    }
+    for name in ("session_per_request", "shared_session"):
+        server = ViewServer(args.image_bytes)
+        address = await server.start()
+        if name == "session_per_request":
+
+            async def get_image(*params):
+                return await reference_get_image(address, *params)
+
+            client = None
+        else:
+            client = ComfyUIClient(
+                address, max_connections=args.concurrency
+            )
+            # Only the HTTP session, there is no WebSocket to connect to
+            client.open_session()
+            get_image = client.get_image
+
+        await get_image("warmup.png", "", "output")
+        per_image, total = await time_downloads(
+            get_image, args.images, args.concurrency
+        )
+        report[name] = {
+            "median_s_per_image": per_image,
+            "total_s": total,
+            "tcp_connections": len(server.peers),
+        }
+        if client is not None:
+            await client.close()
+        await server.stop()
+
+    reference = report["session_per_request"]["median_s_per_image"]
+    shared = report["shared_session"]["median_s_per_image"]
+    report["overhead_saved_ms_per_image"] = (reference - shared) * 1000
+    report["speedup"] = reference / shared
+    print(json.dumps(report, indent=4))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--image-bytes", type=int, default=1500000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Checks and benchmarks the text normalization of the TTS frontend.
+
+Every case of normalize_golden.json, recorded from the original
+sequential-regex implementation, must give the same output with the
+current normalize_text and postprocess_phonemes. The throughput of both is
+then compared against the original implementation, kept below as the
+reference.
+
+Run from the repository root:
+    poetry run python benchmarks/tts/normalize.py --runs 5
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from tts.kokoro import (
+    VOCAB,
+    flip_money,
+    normalize_text,
+    point_num,
+    postprocess_phonemes,
+    split_num,
+)
+
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "normalize_golden.json")
+
+
+def reference_normalize_text(text):
+    text = text.replace(chr(8216), "'").replace(chr(8217), "'")
+    text = text.replace("«", chr(8220)).replace("»", chr(8221))
+    text = text.replace(chr(8220), '"').replace(chr(8221), '"')
+    text = text.replace("(", "«").replace(")", "»")
+    for a, b in zip("、。！，：；？", ",.!,:;?"):
+        text = text.replace(a, b + " ")
+    text = re.sub(r"[^\S \n]", " ", text)
+    text = re.sub(r"  +", " ", text)
+    text = re.sub(r"(?<=\n) +(?=\n)", "", text)
+    text = re.sub(r"\bD[Rr]\.(?= [A-Z])", "Doctor", text)
+    text = re.sub(r"\b(?:Mr\.|MR\.(?= [A-Z]))", "Mister", text)
+    text = re.sub(r"\b(?:Ms\.|MS\.(?= [A-Z]))", "Miss", text)
+    text = re.sub(r"\b(?:Mrs\.|MRS\.(?= [A-Z]))", "Mrs", text)
+    text = re.sub(r"\betc\.(?! [A-Z])", "etc", text)
+    text = re.sub(r"(?i)\b(y)eah?\b", r"\1e'a", text)
+    text = re.sub(
+        r"\d*\.\d+|\b\d{4}s?\b|(?<!:)\b(?:[1-9]|1[0-2]):[0-5]\d\b(?!:)",
+        split_num,
+        text,
+    )
+    text = re.sub(r"(?<=\d),(?=\d)", "", text)
+    text = re.sub(
+        r"(?i)[$£]\d+(?:\.\d+)?(?: hundred| thousand| (?:[bm]|tr)illion)*\b|"
+        r"[$£]\d+\.\d\d?\b",
+        flip_money,
+        text,
+    )
+    text = re.sub(r"\d*\.\d+", point_num, text)
+    text = re.sub(r"(?<=\d)-(?=\d)", " to ", text)
+    text = re.sub(r"(?<=\d)S", " S", text)
+    text = re.sub(r"(?<=[BCDFGHJ-NP-TV-Z])'?s\b", "'S", text)
+    text = re.sub(r"(?<=X')S\b", "s", text)
+    text = re.sub(
+        r"(?:[A-Za-z]\.){2,} [a-z]",
+        lambda m: m.group().replace(".", "-"),
+        text,
+    )
+    text = re.sub(r"(?i)(?<=[A-Z])\.(?=[A-Z])", "-", text)
+    return text.strip()
+
+
+def reference_postprocess_phonemes(ps, lang):
+    ps = ps.replace("kəkˈoːɹoʊ", "kˈoʊkəɹoʊ").replace("kəkˈɔːɹəʊ", "kˈəʊkəɹəʊ")
+    ps = (
+        ps.replace("ʲ", "j")
+        .replace("r", "ɹ")
+        .replace("x", "k")
+        .replace("ɬ", "l")
+    )
+    ps = re.sub(r"(?<=[a-zɹː])(?=hˈʌndɹɪd)", " ", ps)
+    ps = re.sub(r' z(?=[;:,.!?¡¿—…"«»“” ]|$)', "z", ps)
+    if lang == "a":
+        ps = re.sub(r"(?<=nˈaɪn)ti(?!ː)", "di", ps)
+    ps = "".join(filter(lambda p: p in VOCAB, ps))
+    return ps.strip()
+
+
+def check_golden(golden):
+    failures = 0
+    for text, expected in golden["normalize_text"]:
+        if normalize_text(text) != expected:
+            failures += 1
+            print(f"normalize_text mismatch for {text!r}", file=sys.stderr)
+    for ps, lang, expected in golden["postprocess_phonemes"]:
+        if postprocess_phonemes(ps, lang) != expected:
+            failures += 1
+            print(f"postprocess_phonemes mismatch for {ps!r}", file=sys.stderr)
+    return failures
+
+
+def throughput(func, cases, runs):
+    # Characters processed per second, median over the runs
+    num_chars = sum(len(case[0]) for case in cases)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for case in cases:
+            func(*case)
+        times.append(time.perf_counter() - start)
+    return num_chars / float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(GOLDEN_FILE) as f:
+        golden = json.load(f)
+
+    failures = check_golden(golden)
+    texts = [(text,) for text, _ in golden["normalize_text"]]
+    phonemes = [(ps, lang) for ps, lang, _ in golden["postprocess_phonemes"]]
+    report = {"golden_cases": sum(map(len, golden.values()))}
+    report["golden_failures"] = failures
+    for name, func, reference, cases in (
+        ("normalize_text", normalize_text, reference_normalize_text, texts),
+        (
+            "postprocess_phonemes",
+            postprocess_phonemes,
+            reference_postprocess_phonemes,
+            phonemes,
+        ),
+    ):
+        current = throughput(func, cases, args.runs)
+        original = throughput(reference, cases, args.runs)
+        report[name] = {
+            "chars_per_s": current,
+            "reference_chars_per_s": original,
+            "speedup": current / original,
+        }
+
+    print(json.dumps(report, indent=4))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
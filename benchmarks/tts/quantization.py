@@ -0,0 +1,144 @@
+"""
+Speed and quality comparison of the dynamic int8 TTS model against fp32 on
+CPU. Reports the real-time factor (synthesis time / audio duration) of both
+models, their serialized size and how far the int8 waveforms are from the
+fp32 ones.
+
+Without the checkpoint at --model-path (or with --random-weights) the
+models are randomly initialized, so the benchmark runs on a fresh checkout.
+The speed is then still representative, but the waveform difference and
+model sizes are only meaningful with the real checkpoint.
+
+Run from the repository root:
+    poetry run python benchmarks/tts/quantization.py --runs 3
+"""
+import io
+import os
+import copy
+import json
+import time
+import argparse
+import numpy as np
+import torch
+from tts.kokoro import phonemize, tokenize, forward
+from tts.model import build_model, quantize_dynamic_int8
+from tts.text_to_speech import (
+    DEFAULT_MODEL_PATH,
+    DEFAULT_VOICES_DIR,
+    SAMPLE_RATE,
+)
+
+TEXTS = [
+    "The city council approved the new budget on Tuesday.",
+    "Officials said the bridge, which was built in 1932, will be closed "
+    "for repairs until the end of next year, and drivers should expect "
+    "delays of up to forty minutes during the morning rush hour.",
+    "If you enjoyed this video, make sure to like, comment, and subscribe "
+    "to The American Shuffle for more stories like this one. We will see "
+    "you in the next video, and until then, stay curious and stay "
+    "informed about what is happening around the world.",
+]
+
+
+def synthesize(model, tokens, voicepack, seed):
+    # Same seed for both models, so the decoder noise is identical
+    torch.manual_seed(seed)
+    start = time.perf_counter()
+    audio = forward(model, tokens, voicepack[len(tokens)], 1)
+    return audio, time.perf_counter() - start
+
+
+def build_fp32_model(model_path, seed):
+    if model_path is not None:
+        return build_model(model_path, "cpu", fuse=True)
+    torch.manual_seed(seed)
+    model = build_model(None, "cpu", fuse=True)
+    # Random duration logits predict about 25 frames per token. Shift them
+    # to about 2.4 frames, close to real speech, as in rtf.py.
+    with torch.no_grad():
+        model.predictor.duration_proj.linear_layer.bias.fill_(-3.0)
+    return model
+
+
+def model_mb(model):
+    buffer = io.BytesIO()
+    state = {name: module.state_dict() for name, module in model.items()}
+    torch.save(state, buffer)
+    return buffer.tell() / 2**20
+
+
+def compare(reference, audio):
+    length = min(len(reference), len(audio))
+    reference, audio = reference[:length], audio[:length]
+    error = reference - audio
+    snr = 10 * np.log10(np.sum(reference**2) / max(np.sum(error**2), 1e-12))
+    return {
+        "length_ratio": len(audio) / len(reference),
+        "max_abs_diff": float(np.max(np.abs(error))),
+        "snr_db": float(snr),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-path", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--voice", default="af_sarah")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--random-weights", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    random_weights = args.random_weights or not os.path.exists(
+        args.model_path
+    )
+    fp32 = build_fp32_model(
+        None if random_weights else args.model_path, args.seed
+    )
+    int8 = quantize_dynamic_int8(copy.deepcopy(fp32))
+    voicepack = torch.load(
+        f"{DEFAULT_VOICES_DIR}/{args.voice}.pt", weights_only=True
+    )
+
+    report = {
+        "threads": torch.get_num_threads(),
+        # Difference and sizes only mean something with the real weights
+        "random_weights": random_weights,
+        "fp32_model_mb": model_mb(fp32),
+        "int8_model_mb": model_mb(int8),
+        "texts": [],
+    }
+    totals = {"fp32": [0.0, 0.0], "int8": [0.0, 0.0]}
+    for seed, text in enumerate(TEXTS):
+        tokens = tokenize(phonemize(text, "a"))
+        entry = {"tokens": len(tokens)}
+        outputs = {}
+        for name, model in (("fp32", fp32), ("int8", int8)):
+            synthesize(model, tokens, voicepack, seed)  # warm-up
+            times = []
+            for _ in range(args.runs):
+                audio, elapsed = synthesize(model, tokens, voicepack, seed)
+                times.append(elapsed)
+            seconds = len(audio) / SAMPLE_RATE
+            entry[name] = {
+                "latency_s": float(np.median(times)),
+                "audio_s": seconds,
+                "rtf": float(np.median(times)) / seconds,
+            }
+            totals[name][0] += float(np.median(times))
+            totals[name][1] += seconds
+            outputs[name] = audio
+        entry["difference"] = compare(outputs["fp32"], outputs["int8"])
+        report["texts"].append(entry)
+
+    for name, (elapsed, seconds) in totals.items():
+        report[f"{name}_rtf"] = elapsed / seconds
+    report["speedup"] = report["fp32_rtf"] / report["int8_rtf"]
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Real-time-factor benchmark of the TTS stack. Synthesizes a fixed corpus of
+scripts at several lengths and reports, as JSON, the latency of every
+phase (text normalization, espeak phonemization, tokenization, PLBERT,
+prosody predictor, text encoder, decoder and WAV writing), the real-time
+factor (processing time / audio duration), the peak RSS and the number of
+threads.
+
+The model is randomly initialized, so no checkpoint is needed. Only the
+speed is meaningful, the audio is noise. espeak-ng must be installed.
+
+Run from the repository root:
+    poetry run python benchmarks/tts/rtf.py --runs 3
+"""
+import os
+import json
+import time
+import argparse
+import resource
+import tempfile
+from collections import defaultdict
+import numpy as np
+import torch
+from tts import kokoro
+from tts.kokoro import normalize_text, phonemize_batch, tokenize
+from tts.model import build_model
+from tts.text_to_speech import (
+    BATCH_SIZE,
+    SAMPLE_RATE,
+    ChunkPlan,
+    WavStreamWriter,
+    split_text_by_sentences,
+)
+
+SENTENCES = [
+    "The city council approved a $4.5 million budget on Tuesday, "
+    "setting aside funds for 12 new schools.",
+    "Officials said the bridge, which was built in 1932, will be closed "
+    "for repairs until the end of next year.",
+    "Dr. Smith told reporters that the results were encouraging, but "
+    "warned that more research is needed.",
+    "Shares of the company rose 3.2% in early trading after it reported "
+    "better-than-expected earnings.",
+    "Residents have until March 15th to submit comments on the proposal.",
+    "The storm is expected to bring heavy rain and winds of up to 60 miles "
+    "per hour along the coast.",
+    "Meanwhile, volunteers handed out food and water to families who had "
+    "been displaced by the flooding.",
+    "If you enjoyed this video, make sure to like, comment, and subscribe "
+    "to The American Shuffle for more stories like this one.",
+]
+
+# Number of sentences of the short, medium and long scripts
+SCRIPT_LENGTHS = [1, 8, 32]
+
+PHASES = [
+    "normalize_text",
+    "phonemize",
+    "tokenize",
+    "plbert",
+    "predictor",
+    "text_encoder",
+    "decoder",
+    "wav_write",
+]
+
+
+def build_script(num_sentences):
+    return " ".join(
+        SENTENCES[i % len(SENTENCES)] for i in range(num_sentences)
+    )
+
+
+def build_random_model(seed):
+    torch.manual_seed(seed)
+    model = build_model(None, "cpu", fuse=True)
+    # Random duration logits predict about 25 frames per token. Shift them
+    # to about 2.4 frames, close to real speech, so that the decoder works
+    # on a realistic amount of audio per token.
+    with torch.no_grad():
+        model.predictor.duration_proj.linear_layer.bias.fill_(-3.0)
+    return model
+
+
+class PhaseTimer:
+    """
+    Accumulates the time spent in named phases. Model phases are timed by
+    wrapping the forward methods of the submodules that run them.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.times = defaultdict(float)
+
+    def measure(self, phase, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.times[phase] += time.perf_counter() - start
+        return result
+
+    def wrap(self, obj, name, phase):
+        func = getattr(obj, name)
+
+        def timed(*args, **kwargs):
+            return self.measure(phase, func, *args, **kwargs)
+
+        setattr(obj, name, timed)
+
+    def instrument(self, model):
+        self.wrap(model.bert, "forward", "plbert")
+        self.wrap(model.bert_encoder, "forward", "plbert")
+        self.wrap(model.predictor.text_encoder, "forward", "predictor")
+        self.wrap(model.predictor.lstm, "forward", "predictor")
+        self.wrap(model.predictor.duration_proj, "forward", "predictor")
+        self.wrap(model.predictor, "F0Ntrain", "predictor")
+        self.wrap(model.text_encoder, "forward", "text_encoder")
+        self.wrap(model.decoder, "forward", "decoder")
+
+
+def run_script(script, model, voicepack, timer, output_file):
+    normalized = timer.measure("normalize_text", normalize_text, script)
+    sentences = split_text_by_sentences(normalized)
+    # Cached phonemes would hide the cost of espeak
+    kokoro._phoneme_cache.clear()
+    phonemes = timer.measure(
+        "phonemize", phonemize_batch, sentences, "a", norm=False
+    )
+    num_tokens = sum(
+        len(timer.measure("tokenize", tokenize, ps)) for ps in phonemes
+    )
+
+    # Reuses the phonemes cached above
+    plan = ChunkPlan.from_text(script)
+    chunks = list(plan)
+    num_samples = 0
+    audios = []
+    for start in range(0, len(chunks), BATCH_SIZE):
+        batch = chunks[start: start + BATCH_SIZE]
+        results = kokoro.generate_batch(
+            model,
+            [chunk.text for chunk in batch],
+            voicepack,
+            ps_list=[chunk.phonemes for chunk in batch],
+        )
+        for audio, _ in filter(None, results):
+            audios.append(audio)
+            num_samples += len(audio)
+
+    def write_wav():
+        with WavStreamWriter(output_file) as writer:
+            for audio in audios:
+                writer.write(audio)
+
+    timer.measure("wav_write", write_wav)
+    return {
+        "sentences": len(sentences),
+        "characters": len(script),
+        "tokens": num_tokens,
+        "chunks": len(chunks),
+        "audio_s": num_samples / SAMPLE_RATE,
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    model = build_random_model(args.seed)
+    voicepack = torch.randn(511, 1, 256) * 0.1
+    output_file = os.path.join(tempfile.mkdtemp(), "benchmark.wav")
+
+    timer = PhaseTimer()
+    timer.instrument(model)
+    # Warm-up, so that lazy initialization is not counted
+    run_script(SENTENCES[0], model, voicepack, timer, output_file)
+
+    report = {
+        "torch": torch.__version__,
+        "threads": torch.get_num_threads(),
+        "interop_threads": torch.get_num_interop_threads(),
+        "scripts": [],
+    }
+    for num_sentences in SCRIPT_LENGTHS:
+        script = build_script(num_sentences)
+        runs = []
+        for run in range(args.runs):
+            torch.manual_seed(args.seed + run)
+            timer.reset()
+            info = run_script(script, model, voicepack, timer, output_file)
+            runs.append(dict(timer.times))
+        phases = {
+            phase: float(np.median([times.get(phase, 0.0) for times in runs]))
+            for phase in PHASES
+        }
+        total = sum(phases.values())
+        report["scripts"].append(
+            {
+                **info,
+                "phases_s": phases,
+                "phases_rtf": {
+                    phase: elapsed / info["audio_s"]
+                    for phase, elapsed in phases.items()
+                },
+                "total_s": total,
+                "rtf": total / info["audio_s"],
+            }
+        )
+
+    report["peak_rss_mb"] = peak_rss_mb()
+    os.remove(output_file)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Micro-benchmark of the harmonic source of the iSTFTNet decoder. Compares
+the sample-rate path (SourceModuleHnNSF.forward on upsampled F0) with the
+frame-rate fast path the decoder uses (SourceModuleHnNSF.forward_frames),
+and checks that both produce the same sines and voicing.
+
+Run from the repository root:
+    poetry run python benchmarks/tts/sinegen.py --runs 20
+"""
+import json
+import time
+import argparse
+import numpy as np
+import torch
+from tts.istftnet import SourceModuleHnNSF
+
+# Same settings as the decoder's source module
+SAMPLE_RATE = 24000
+UPSAMPLE_SCALE = 300
+HARMONIC_NUM = 8
+VOICED_THRESHOLD = 10
+
+# F0 frames of roughly 5, 20 and 60 seconds of audio
+NUM_FRAMES = [400, 1600, 4800]
+
+
+def random_f0(num_frames, generator):
+    # Voiced stretches around a speaking pitch, with unvoiced gaps
+    f0 = 100 + 100 * torch.rand(1, num_frames, 1, generator=generator)
+    voiced = torch.rand(1, num_frames // 20, 1, generator=generator) > 0.3
+    return f0 * voiced.repeat_interleave(20, dim=1)
+
+
+def median_time(func, runs):
+    func()  # warm-up
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    source = SourceModuleHnNSF(
+        sampling_rate=SAMPLE_RATE,
+        upsample_scale=UPSAMPLE_SCALE,
+        harmonic_num=HARMONIC_NUM,
+        voiced_threshold=VOICED_THRESHOLD,
+    ).eval()
+    sine_gen = source.l_sin_gen
+    upsample = torch.nn.Upsample(scale_factor=UPSAMPLE_SCALE)
+    generator = torch.Generator().manual_seed(0)
+
+    report = {"threads": torch.get_num_threads(), "lengths": []}
+    with torch.inference_mode():
+        for num_frames in NUM_FRAMES:
+            f0 = random_f0(num_frames, generator)
+            f0_up = upsample(f0.transpose(1, 2)).transpose(1, 2)
+
+            sines = sine_gen._f02sine(f0_up * sine_gen.harmonics)
+            sines_fast = sine_gen._f02sine_frames(f0 * sine_gen.harmonics)
+            _, uv, _ = sine_gen(f0_up)
+            _, uv_fast, _ = sine_gen.forward_frames(f0)
+
+            reference = median_time(lambda: source(f0_up), args.runs)
+            fast = median_time(
+                lambda: source.forward_frames(f0), args.runs
+            )
+            report["lengths"].append(
+                {
+                    "frames": num_frames,
+                    "samples": f0_up.shape[1],
+                    "reference_s": reference,
+                    "fast_s": fast,
+                    "speedup": reference / fast,
+                    "max_abs_sine_diff": float(
+                        (sines - sines_fast).abs().max()
+                    ),
+                    "uv_equal": bool(torch.equal(uv, uv_fast)),
+                }
+            )
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+
+logger = logging.getLogger()
+
+RESULT_FILE = "result.json"
+
+
+class ArtifactCache:
+    """
+    Content-addressed store for pipeline stage outputs.
+
+    Every stage output is stored under `<root>/<stage>/<key>`, where the key
+    is a hash of everything the output depends on. A stage folder holds the
+    files written by the stage and a `result.json` with its return value,
+    which is only written once the stage succeeded.
+    """
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root (str): Folder where artifacts are stored.
+        """
+        self.root = root
+
+    @staticmethod
+    def key(inputs: dict) -> str:
+        """
+        Hashes the inputs of a stage.
+
+        Args:
+            inputs (dict): JSON serializable values the stage output
+                           depends on.
+
+        Returns:
+            str: Hex digest identifying the artifact.
+        """
+        payload = json.dumps(
+            inputs, sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, stage: str, key: str) -> str:
+        """
+        Returns the folder of an artifact.
+
+        Args:
+            stage (str): Name of the stage.
+            key (str): Artifact key.
+
+        Returns:
+            str: Path of the artifact folder.
+        """
+        return os.path.join(self.root, stage, key)
+
+    def load(self, stage: str, key: str):
+        """
+        Loads the stored output of a stage.
+
+        Args:
+            stage (str): Name of the stage.
+            key (str): Artifact key.
+
+        Returns:
+            tuple: (found, result) where `found` tells whether a complete
+                   artifact exists.
+        """
+        result_file = os.path.join(self.path(stage, key), RESULT_FILE)
+        if not os.path.exists(result_file):
+            return False, None
+        with open(result_file, "r") as f:
+            return True, json.load(f)["result"]
+
+    def workdir(self, stage: str, key: str) -> str:
+        """
+        Creates an empty folder for a stage to write its files into. Leftovers
+        of a previously failed run are removed.
+
+        Args:
+            stage (str): Name of the stage.
+            key (str): Artifact key.
+
+        Returns:
+            str: Path of the artifact folder.
+        """
+        path = self.path(stage, key)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+        return path
+
+    def save(self, stage: str, key: str, result) -> None:
+        """
+        Marks an artifact as complete by storing the stage's return value.
+
+        Args:
+            stage (str): Name of the stage.
+            key (str): Artifact key.
+            result: JSON serializable return value of the stage.
+        """
+        path = self.path(stage, key)
+        os.makedirs(path, exist_ok=True)
+        tmp_file = os.path.join(path, f"{RESULT_FILE}.tmp")
+        with open(tmp_file, "w") as f:
+            json.dump({"result": result}, f, indent=4)
+        # Atomic, so an interrupted write never looks like a finished stage
+        os.replace(tmp_file, os.path.join(path, RESULT_FILE))
+        logger.info(f"Stored '{stage}' artifact at {path}")
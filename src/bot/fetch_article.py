@@ -13,12 +13,13 @@ logging.config.fileConfig(config.get("logging_config_file"))
 logger = logging.getLogger()
 
 
-def download_image(url: str) -> None:
+def download_image(url: str, session=None) -> None:
     """
     Downloads an image from the given URL and saves it to the 'images' folder.
 
     Args:
         url (str): The URL of the image to download.
+        session (requests.Session, optional): Session to reuse connections.
 
     Raises:
         HTTPError: If the HTTP request for the image fails.
@@ -28,7 +29,7 @@ def download_image(url: str) -> None:
         logger.info(f"Starting download of image from URL: {url}")
 
         # Download the image
-        image_response = requests.get(url)
+        image_response = (session or requests).get(url)
         image_response.raise_for_status()
         logger.info("Image downloaded successfully")
 
@@ -53,7 +54,7 @@ def download_image(url: str) -> None:
         raise
 
 
-def extract_news_content(url: str) -> dict:
+def extract_news_content(url: str, session=None) -> dict:
     """
     Extracts news content from a given URL.
 
@@ -63,6 +64,8 @@ def extract_news_content(url: str) -> dict:
 
     Args:
         url (str): The URL of the news article to extract content from.
+        session (requests.Session, optional): Session to reuse connections
+            across articles.
 
     Returns:
         dict: A dictionary containing the extracted content with keys:
@@ -75,7 +78,7 @@ def extract_news_content(url: str) -> dict:
         logger.info(f"Starting extraction of news content from URL: {url}")
 
         # Send a GET request to the URL
-        response = requests.get(url)
+        response = (session or requests).get(url)
         response.raise_for_status()
         logger.info("HTTP request successful")
 
@@ -101,7 +104,7 @@ def extract_news_content(url: str) -> dict:
             if img_tag and img_tag.get("src"):
                 main_image_url = img_tag["src"]
                 logger.info(f"Main image URL extracted: {main_image_url}")
-                download_image(main_image_url)
+                download_image(main_image_url, session=session)
         else:
             logger.info("No main image found")
 
@@ -1,7 +1,9 @@
 import os
+import json
 import yaml
 import asyncio
 from websockets import connect
+from websockets.exceptions import WebSocketException
 import aiohttp
 import logging.config
 import uuid
@@ -15,14 +17,55 @@ with open("./src/config/config.yaml", "r") as config_file:
 logging.config.fileConfig(config.get("logging_config_file"))
 logger = logging.getLogger()
 
-server_address = os.getenv("IMG_GEN_SERVER")
-client_id = str(uuid.uuid4())
+# Longest time a prompt may take to render, in seconds
+PROMPT_TIMEOUT = config.get("comfyui_prompt_timeout", 1800)
+# Most prompts queued on the server at once by a client
+MAX_QUEUE_DEPTH = config.get("comfyui_max_queue_depth", 2)
+# Most HTTP connections a client keeps open to the server
+MAX_CONNECTIONS = config.get("comfyui_max_connections", 4)
+# Longest wait for a server's queue depth before it counts as down
+QUEUE_CHECK_TIMEOUT = 5
+# Bytes written to disk at a time while an image downloads
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+
+
+class PromptExecutionError(RuntimeError):
+    """
+    Raised when ComfyUI failed or was interrupted while executing a prompt.
+    """
+
+
+def is_server_failure(error):
+    """
+    Tells whether an error comes from a server or the connection to it,
+    rather than from the prompt, so that the prompt may be sent again.
+
+    Args:
+        error (Exception): The error.
+
+    Returns:
+        bool: True for connection errors, timeouts and 5xx responses.
+    """
+    if isinstance(error, aiohttp.ClientResponseError):
+        # 4xx responses reject the workflow itself
+        return error.status >= 500
+    return isinstance(
+        error,
+        (
+            aiohttp.ClientError,
+            ConnectionError,
+            asyncio.TimeoutError,
+            WebSocketException,
+        ),
+    )
 
 
 class RetryAsync:
-    def __init__(self, retries=3, delay=2):
+    def __init__(self, retries=3, delay=2, retry_if=None):
         self.retries = retries
         self.delay = delay
+        # Errors for which it returns False are raised at once
+        self.retry_if = retry_if
 
     def __call__(self, func):
         async def wrapper(*args, **kwargs):
@@ -37,6 +80,8 @@ class RetryAsync:
                         f"Error on attempt {attempt + 1} for function "
                         f"{func.__name__}: {e}"
                     )
+                    if self.retry_if is not None and not self.retry_if(e):
+                        raise e
                     logger.info(f"Retrying in {self.delay} seconds...")
                     if attempt < self.retries - 1:
                         await asyncio.sleep(self.delay)
@@ -50,79 +95,666 @@ class RetryAsync:
         return wrapper
 
 
-@RetryAsync(retries=3, delay=2)
-async def queue_prompt(prompt):
-    url = f"http://{server_address}/prompt"
-    data = {"prompt": prompt, "client_id": client_id}
+class PromptTracker:
+    """
+    Follows every prompt queued under one client ID over a single
+    WebSocket, so that any number of prompts can be in flight and each one
+    is handled as soon as ComfyUI finished executing it.
+    """
+
+    def __init__(self, websocket, tracker_client_id):
+        """
+        Args:
+            websocket: WebSocket connected with tracker_client_id.
+            tracker_client_id (str): Client ID the prompts are queued under.
+        """
+        self.websocket = websocket
+        self.client_id = tracker_client_id
+        self.results = {}
+        # Prompts that timed out, whose end is not waited for anymore
+        self.abandoned = set()
+        self.error = None
+        self.reader = asyncio.create_task(self._read())
+
+    def _result(self, prompt_id):
+        # Created on first use, as a prompt can end before its caller
+        # starts waiting for it
+        if prompt_id not in self.results:
+            self.results[prompt_id] = (
+                asyncio.get_running_loop().create_future()
+            )
+        return self.results[prompt_id]
+
+    def _finish(self, prompt_id, error=None):
+        if prompt_id in self.abandoned:
+            self.abandoned.discard(prompt_id)
+            return
+        result = self._result(prompt_id)
+        if result.done():
+            return
+        if error is None:
+            result.set_result(None)
+        else:
+            result.set_exception(error)
+
+    async def _read(self):
+        try:
+            async for message in self.websocket:
+                # Binary messages are previews of the images being sampled
+                if isinstance(message, str):
+                    self._handle(json.loads(message))
+            error = ConnectionError("WebSocket closed")
+        except Exception as e:
+            error = ConnectionError(f"WebSocket failed: {e}")
+        # Prompts still running can no longer be followed
+        for result in self.results.values():
+            if not result.done():
+                result.set_exception(error)
+        self.error = error
+
+    def _handle(self, message):
+        msg_type, data = message.get("type"), message.get("data", {})
+        prompt_id = data.get("prompt_id")
+        if prompt_id is None:
+            return
+
+        if msg_type == "progress":
+            logger.debug(
+                f"Prompt {prompt_id} node {data.get('node')}: "
+                f"step {data['value']}/{data['max']}"
+            )
+        elif msg_type == "executed":
+            logger.info(f"Prompt {prompt_id} node {data['node']} executed")
+        elif msg_type == "executing" and data.get("node") is None:
+            # Sent once every node of the prompt has run
+            self._finish(prompt_id)
+        elif msg_type == "execution_success":
+            self._finish(prompt_id)
+        elif msg_type in ("execution_error", "execution_interrupted"):
+            self._finish(
+                prompt_id,
+                PromptExecutionError(
+                    f"Prompt {prompt_id} failed: "
+                    f"{data.get('exception_message', msg_type)}"
+                ),
+            )
+
+    async def wait(self, prompt_id):
+        """
+        Waits until ComfyUI finished executing a prompt.
+
+        Args:
+            prompt_id (str): ID of the queued prompt.
+
+        Raises:
+            PromptExecutionError: If the execution failed or was
+                                  interrupted.
+            ConnectionError: If the WebSocket closed before the prompt
+                             ended.
+        """
+        if self.reader.done() and prompt_id not in self.results:
+            raise self.error or ConnectionError("WebSocket closed")
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(self._result(prompt_id)),
+                timeout=PROMPT_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            self.abandoned.add(prompt_id)
+            raise
+        finally:
+            self.results.pop(prompt_id, None)
+
+    async def close(self):
+        self.reader.cancel()
+        await self.websocket.close()
+
+
+class GeneratedImage:
+    """
+    An image produced by ComfyUI, kept encoded as it was downloaded, either
+    in memory or in a file. Pixels are only decoded by decode().
+    """
+
+    def __init__(self, filename, data=None, path=None):
+        """
+        Args:
+            filename (str): Name of the image on the ComfyUI server.
+            data (bytes): Encoded image, if kept in memory.
+            path (str): File holding the encoded image, if saved.
+        """
+        self.filename = filename
+        self.data = data
+        self.path = path
+
+    def read(self):
+        """
+        Returns:
+            bytes: The encoded image.
+        """
+        if self.data is not None:
+            return self.data
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def decode(self):
+        """
+        Returns:
+            PIL.Image.Image: The decoded image.
+        """
+        image = Image.open(self.path or BytesIO(self.data))
+        image.load()
+        return image
+
+    def __repr__(self):
+        location = self.path or f"{len(self.data)} bytes"
+        return f"GeneratedImage({self.filename!r}, {location})"
+
+
+def image_path(output_folder, prompt_index, image_index, filename):
+    """
+    Returns where an image is saved. Names sort by prompt, then by image,
+    which is the order the video shows them in.
+
+    Args:
+        output_folder (str): Folder of the images.
+        prompt_index (int): Index of the prompt among the rendered ones.
+        image_index (int): Index of the image among the prompt's outputs.
+        filename (str): Name of the image on the ComfyUI server, whose
+                        extension is kept.
+
+    Returns:
+        str: Path of the image.
+    """
+    extension = os.path.splitext(filename)[1] or ".png"
+    return os.path.join(
+        output_folder, f"img_{prompt_index:03d}_{image_index:02d}{extension}"
+    )
+
+
+async def render_workflows(
+    render_prompt, workflows, save_images=False, output_folder="output_images"
+):
+    if save_images:
+        os.makedirs(output_folder, exist_ok=True)
+    else:
+        output_folder = None
+
+    # Tasks start in order, so prompts are queued in the order of the
+    # workflows
+    tasks = [
+        asyncio.ensure_future(render_prompt(wf, output_folder, idx))
+        for idx, wf in enumerate(workflows)
+    ]
+    try:
+        return await asyncio.gather(*tasks)
+    except Exception:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class ComfyUIClient:
+    """
+    Client of one ComfyUI server. It owns a single HTTP session, whose
+    keep-alive connections are reused by every request, and a single
+    WebSocket that follows all prompts queued under its client ID.
+
+    The session and the WebSocket are opened on first use and reopened if
+    the WebSocket drops, so one client can be shared by every article of a
+    batch.
+    """
+
+    def __init__(
+        self,
+        server_address=None,
+        max_queue_depth=MAX_QUEUE_DEPTH,
+        max_connections=MAX_CONNECTIONS,
+        write_in_thread=True,
+    ):
+        """
+        Args:
+            server_address (str): host:port of the server, IMG_GEN_SERVER
+                                  if not given.
+            max_queue_depth (int): Most prompts queued on the server at
+                                   once.
+            max_connections (int): Most HTTP connections open at once.
+            write_in_thread (bool): Whether saved images are written to
+                                    disk in a worker thread, off the event
+                                    loop.
+        """
+        self.server_address = server_address or os.getenv("IMG_GEN_SERVER")
+        self.client_id = str(uuid.uuid4())
+        self.max_connections = max_connections
+        self.write_in_thread = write_in_thread
+        self.queue_slots = asyncio.Semaphore(max(1, max_queue_depth))
+        # Prompts given to this client that are not on the server yet
+        self.unqueued = 0
+        self.session = None
+        self.tracker = None
+        self.connect_lock = asyncio.Lock()
+
+    async def connect(self):
+        """
+        Opens the HTTP session and the WebSocket unless they are open.
+        """
+        async with self.connect_lock:
+            self.open_session()
+            if self.tracker is None or self.tracker.reader.done():
+                if self.tracker is not None:
+                    await self.tracker.close()
+                self.tracker = PromptTracker(
+                    await self.open_websocket(), self.client_id
+                )
+
+    def open_session(self):
+        """
+        Opens the HTTP session unless it is open. Requests only need the
+        session, prompts need connect() for their WebSocket as well.
+        """
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections)
+            )
+
+    @RetryAsync(retries=3, delay=2)
+    async def open_websocket(self):
+        # Previews can be larger than the default 1 MiB message limit
+        return await connect(
+            f"ws://{self.server_address}/ws?clientId={self.client_id}",
+            max_size=None,
+        )
+
+    async def close(self):
+        if self.tracker is not None:
+            await self.tracker.close()
+            self.tracker = None
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, json=data) as response:
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @RetryAsync(retries=3, delay=2)
+    async def queue_prompt(self, prompt):
+        url = f"http://{self.server_address}/prompt"
+        data = {"prompt": prompt, "client_id": self.client_id}
+
+        async with self.session.post(url, json=data) as response:
             response.raise_for_status()  # Raise error for HTTP 4xx/5xx
             print(f"Prompt queued successfully: {response.status}")
             print(f"Response: {await response.json()}")
             return await response.json()
 
+    @RetryAsync(retries=3, delay=2)
+    async def get_image(self, filename, subfolder, folder_type, path=None):
+        """
+        Downloads an image, into memory or streamed straight to a file.
+
+        Args:
+            filename (str): Name of the image on the server.
+            subfolder (str): Subfolder of the image on the server.
+            folder_type (str): Folder type, e.g. "output".
+            path (str): File to write the image to, if any.
 
-@RetryAsync(retries=3, delay=2)
-async def get_image(filename, subfolder, folder_type):
-    url = f"http://{server_address}/view"
-    params = {
-        "filename": filename,
-        "subfolder": subfolder,
-        "type": folder_type,
-    }
+        Returns:
+            GeneratedImage: The encoded image.
+        """
+        url = f"http://{self.server_address}/view"
+        params = {
+            "filename": filename,
+            "subfolder": subfolder,
+            "type": folder_type,
+        }
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, params=params) as response:
+        async with self.session.get(url, params=params) as response:
             response.raise_for_status()
-            return await response.read()
+            if path is None:
+                return GeneratedImage(filename, data=await response.read())
 
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                async for chunk in response.content.iter_chunked(
+                    DOWNLOAD_CHUNK_SIZE
+                ):
+                    if self.write_in_thread:
+                        await asyncio.to_thread(f.write, chunk)
+                    else:
+                        f.write(chunk)
+        # Atomic, so the video stage never sees a partially written image
+        os.replace(tmp_path, path)
+        logger.info(f"Image saved as {path}")
+        return GeneratedImage(filename, path=path)
 
-@RetryAsync(retries=10, delay=30)
-async def get_history(prompt_id):
-    url = f"http://{server_address}/history/{prompt_id}"
+    @RetryAsync(retries=3, delay=2)
+    async def get_history(self, prompt_id):
+        url = f"http://{self.server_address}/history/{prompt_id}"
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
+        async with self.session.get(url) as response:
             response.raise_for_status()
             history = await response.json()
             return history[prompt_id]
 
+    async def download_outputs(
+        self, prompt_id, output_folder=None, prompt_index=0
+    ):
+        """
+        Downloads the images a finished prompt saved. Previews (images of
+        type "temp", e.g. from a PreviewImage node of the same decoded
+        images) are skipped, so every image is downloaded once.
 
-@RetryAsync(retries=5, delay=3)
-async def generate_images(
-    workflow, save_images=False, output_folder="output_images"
-):
-    async with connect(f"ws://{server_address}/ws"):
-        wf_data = await queue_prompt(workflow)
-        wf_id = wf_data[
-            "prompt_id"
-        ]  # Get the workflow ID as represented by prompt_id
-        output_images = {}
+        Args:
+            prompt_id (str): ID of the finished prompt.
+            output_folder (str): Folder to save the images to, if any.
+            prompt_index (int): Index of the prompt, part of the file names.
 
-        # Fetch history and images
-        history = await get_history(wf_id)
+        Returns:
+            dict: GeneratedImage objects, keyed by output node ID.
+        """
+        history = await self.get_history(prompt_id)
+        output_images = {}
+        image_index = 0
         for node_id in history["outputs"]:
             node_output = history["outputs"][node_id]
             images_output = []
             if "images" in node_output:
                 for image in node_output["images"]:
-                    print(image["filename"], image["subfolder"], image["type"])
-                    image_data = await get_image(
+                    if image.get("type") != "output":
+                        continue
+                    print(
                         image["filename"], image["subfolder"], image["type"]
                     )
+                    path = None
+                    if output_folder is not None:
+                        path = image_path(
+                            output_folder,
+                            prompt_index,
+                            image_index,
+                            image["filename"],
+                        )
+                    image_data = await self.get_image(
+                        image["filename"],
+                        image["subfolder"],
+                        image["type"],
+                        path=path,
+                    )
                     images_output.append(image_data)
-            output_images[node_id] = images_output
-
-        for idx, img in enumerate(output_images[node_id]):
-            bytesIO = BytesIO(img)
-            preview_image = Image.open(bytesIO)
-
-            # Save the image
-            if save_images:
-                if not os.path.exists(output_folder):
-                    os.makedirs(output_folder)
-                image_path = f"{output_folder}/img_{idx}.png"
-                preview_image.save(image_path)
-                logger.info(f"Image saved as {image_path}")
+                    image_index += 1
+            if images_output:
+                output_images[node_id] = images_output
         return output_images
+
+    async def run_prompt(self, workflow, output_folder=None, prompt_index=0):
+        """
+        Queues one prompt once a queue slot is free, waits for it and
+        downloads its images. The slot is released as soon as the prompt
+        ran, so the next prompt renders while these images download.
+
+        Args:
+            workflow (dict): ComfyUI API workflow.
+            output_folder (str): Folder to save the images to, if any.
+            prompt_index (int): Index of the prompt, part of the file names.
+
+        Returns:
+            dict: GeneratedImage objects, keyed by output node ID.
+        """
+        # Counted from the call, so that a scheduler choosing a server
+        # right after sees this prompt before it reaches the server queue
+        self.unqueued += 1
+        unqueued = True
+        try:
+            await self.connect()
+            async with self.queue_slots:
+                wf_data = await self.queue_prompt(workflow)
+                self.unqueued -= 1
+                unqueued = False
+                wf_id = wf_data[
+                    "prompt_id"
+                ]  # Get the workflow ID as represented by prompt_id
+                try:
+                    await self.tracker.wait(wf_id)
+                except Exception as e:
+                    # The prompt is sent elsewhere, so it must not keep
+                    # rendering here
+                    if is_server_failure(e):
+                        await self.cancel_prompt(wf_id)
+                    raise
+        finally:
+            if unqueued:
+                self.unqueued -= 1
+        return await self.download_outputs(wf_id, output_folder, prompt_index)
+
+    async def cancel_prompt(self, prompt_id):
+        """
+        Removes a prompt from the server queue, and interrupts it if it is
+        running. Failures are logged, as the server may well be down.
+
+        Args:
+            prompt_id (str): ID of the queued prompt.
+        """
+        self.open_session()
+        url = f"http://{self.server_address}"
+        timeout = aiohttp.ClientTimeout(total=QUEUE_CHECK_TIMEOUT)
+        try:
+            async with self.session.post(
+                f"{url}/queue", json={"delete": [prompt_id]}, timeout=timeout
+            ) as response:
+                response.raise_for_status()
+            async with self.session.get(
+                f"{url}/queue", timeout=timeout
+            ) as response:
+                response.raise_for_status()
+                queue = await response.json()
+            # Queue items are [number, prompt_id, prompt, ...]. A plain
+            # interrupt stops whatever runs, so it is only sent while this
+            # prompt does.
+            if any(item[1] == prompt_id for item in queue["queue_running"]):
+                async with self.session.post(
+                    f"{url}/interrupt",
+                    json={"prompt_id": prompt_id},
+                    timeout=timeout,
+                ) as response:
+                    response.raise_for_status()
+            logger.info(f"Prompt {prompt_id} cancelled")
+        except Exception as e:
+            logger.warning(f"Could not cancel prompt {prompt_id}: {e}")
+
+    @RetryAsync(retries=5, delay=3, retry_if=is_server_failure)
+    async def render_prompt(
+        self, workflow, output_folder=None, prompt_index=0
+    ):
+        return await self.run_prompt(workflow, output_folder, prompt_index)
+
+    async def get_queue_depth(self):
+        """
+        Returns the number of prompts running or pending on the server,
+        from every client. Not retried, as it doubles as a health check.
+
+        Returns:
+            int: Queue depth of the server.
+        """
+        self.open_session()
+        url = f"http://{self.server_address}/queue"
+        timeout = aiohttp.ClientTimeout(total=QUEUE_CHECK_TIMEOUT)
+        async with self.session.get(url, timeout=timeout) as response:
+            response.raise_for_status()
+            queue = await response.json()
+            return len(queue["queue_running"]) + len(queue["queue_pending"])
+
+    async def generate_images(
+        self, workflows, save_images=False, output_folder="output_images"
+    ):
+        """
+        Renders several workflows, keeping up to max_queue_depth prompts
+        queued on the server so that it never waits for the next prompt
+        while the images of the previous one are downloaded and saved.
+
+        Args:
+            workflows (list): ComfyUI API workflows, one per prompt.
+            save_images (bool): Whether to save the images to
+                                output_folder.
+            output_folder (str): Folder to save the images to.
+
+        Returns:
+            list: GeneratedImage objects keyed by output node ID, for
+                  every workflow in order. Saved images are named
+                  img_<prompt>_<image>.png.
+        """
+        return await render_workflows(
+            self.render_prompt, workflows, save_images, output_folder
+        )
+
+
+class ComfyUIPool:
+    """
+    Spreads prompts over several ComfyUI servers. Every prompt goes to the
+    reachable server with the fewest prompts queued, and is rerouted to
+    another server if its server fails before the images are downloaded.
+    """
+
+    def __init__(
+        self,
+        server_addresses=None,
+        max_queue_depth=MAX_QUEUE_DEPTH,
+        max_connections=MAX_CONNECTIONS,
+        write_in_thread=True,
+    ):
+        """
+        Args:
+            server_addresses (list): host:port of every server, the comma
+                                     separated IMG_GEN_SERVER if not given.
+            max_queue_depth (int): Most prompts queued on each server at
+                                   once.
+            max_connections (int): Most HTTP connections open at once to
+                                   each server.
+            write_in_thread (bool): Whether saved images are written to
+                                    disk in a worker thread, off the event
+                                    loop.
+        """
+        if server_addresses is None:
+            server_addresses = os.getenv("IMG_GEN_SERVER", "").split(",")
+        self.clients = [
+            ComfyUIClient(
+                address.strip(),
+                max_queue_depth,
+                max_connections,
+                write_in_thread,
+            )
+            for address in server_addresses
+            if address.strip()
+        ]
+        if not self.clients:
+            raise ValueError("No ComfyUI server configured")
+
+    async def close(self):
+        for client in self.clients:
+            await client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def pick_client(self, exclude=()):
+        """
+        Returns the least loaded client among the reachable ones.
+
+        Args:
+            exclude (set): Clients not to choose.
+
+        Returns:
+            ComfyUIClient: Client of the chosen server.
+
+        Raises:
+            ConnectionError: If no server is left to choose.
+        """
+        candidates = [c for c in self.clients if c not in exclude]
+        if len(candidates) <= 1:
+            # Nothing to compare, the prompt finds out whether it is up
+            if candidates:
+                return candidates[0]
+            raise ConnectionError("No ComfyUI server left to try")
+
+        depths = await asyncio.gather(
+            *(client.get_queue_depth() for client in candidates),
+            return_exceptions=True,
+        )
+        loads = {}
+        for client, depth in zip(candidates, depths):
+            if isinstance(depth, Exception):
+                logger.warning(
+                    f"ComfyUI server {client.server_address} is "
+                    f"unreachable: {depth}"
+                )
+            else:
+                # Our own prompts that are not on the server yet count too
+                loads[client] = depth + client.unqueued
+        if not loads:
+            raise ConnectionError("No ComfyUI server is reachable")
+        return min(loads, key=loads.get)
+
+    @RetryAsync(retries=3, delay=3, retry_if=is_server_failure)
+    async def render_prompt(
+        self, workflow, output_folder=None, prompt_index=0
+    ):
+        """
+        Renders one prompt on the least loaded server, and on the next
+        least loaded one every time a server fails or times out, after
+        cancelling it on the failed server. Errors of the prompt itself,
+        such as a failed execution, are raised at once.
+
+        Args:
+            workflow (dict): ComfyUI API workflow.
+            output_folder (str): Folder to save the images to, if any.
+            prompt_index (int): Index of the prompt, part of the file names.
+
+        Returns:
+            dict: GeneratedImage objects, keyed by output node ID.
+        """
+        tried = set()
+        while True:
+            client = await self.pick_client(tried)
+            try:
+                return await client.run_prompt(
+                    workflow, output_folder, prompt_index
+                )
+            except Exception as e:
+                # A prompt that fails to execute would fail everywhere
+                if not is_server_failure(e):
+                    raise
+                tried.add(client)
+                if len(tried) == len(self.clients):
+                    raise
+                logger.warning(
+                    f"Prompt failed on {client.server_address}, "
+                    f"rerouting: {e}"
+                )
+
+    async def generate_images(
+        self, workflows, save_images=False, output_folder="output_images"
+    ):
+        """
+        Renders several workflows across the servers, keeping up to
+        max_queue_depth prompts queued on each of them.
+
+        Args:
+            workflows (list): ComfyUI API workflows, one per prompt.
+            save_images (bool): Whether to save the images to
+                                output_folder.
+            output_folder (str): Folder to save the images to.
+
+        Returns:
+            list: GeneratedImage objects keyed by output node ID, for
+                  every workflow in order. Saved images are named
+                  img_<prompt>_<image>.png.
+        """
+        return await render_workflows(
+            self.render_prompt, workflows, save_images, output_folder
+        )
@@ -1,14 +1,30 @@
+import os
+import copy
 import yaml
 import json
 import random
+import asyncio
+import hashlib
+import argparse
+import requests
 import logging.config
 from dotenv import load_dotenv, find_dotenv
 
 from fetch_article import extract_news_content
 from script_gen import generate_script, generate_prompts, generate_title_desc
+from bot.prompts import (
+    script_gen_sys_prompt,
+    script_gen_human_prompt,
+    prompts_gen_sys_prompt,
+    prompts_gen_human_prompt,
+    title_gen_sys_prompt,
+    title_gen_human_prompt,
+)
 
-from image_gen import generate_images
-from tts.text_to_speech import generate_audio
+from artifact_cache import ArtifactCache
+from image_gen import ComfyUIPool
+from pipeline import Pipeline
+from tts.text_to_speech import generate_audio, get_voice_model
 from video_creator import create_video_with_audio
 from video_uploader import upload_video, get_authenticated_service
 
@@ -22,71 +38,392 @@ logger = logging.getLogger()
 
 load_dotenv(find_dotenv())
 
+OUTPUT_DIR = "./src/bot/outputs"
+ARTIFACT_CACHE_DIR = config.get("artifact_cache_dir", "./src/bot/cache")
+NUM_IMAGES = 2
+YT_PRIVACY_STATUS = "private"
+
+
+def build_pipeline(
+    output_dir: str,
+    http_session=None,
+    kokoro=None,
+    comfyui: ComfyUIPool = None,
+    limits: dict = None,
+    cache: ArtifactCache = None,
+    num_images: int = NUM_IMAGES,
+    seed: int = None,
+    yt_privacy_status: str = YT_PRIVACY_STATUS,
+) -> Pipeline:
+    """
+    Builds the stage graph that turns one article URL into an uploaded video.
+
+    Args:
+        output_dir (str): Folder where the article's outputs are written.
+        http_session (requests.Session): Shared session for article fetching.
+        kokoro (KokoroVoiceModel): Already loaded TTS model.
+        comfyui (ComfyUIPool): Shared image generation servers, opened per
+                               image stage if not given.
+        limits (dict): Per-stage semaphores shared across articles.
+        cache (ArtifactCache): Store that makes the expensive stages
+                               resumable. Without it every stage runs and
+                               writes into `output_dir`.
+        num_images (int): Number of images generated per prompt.
+        seed (int): Seed for image generation, random if not given.
+        yt_privacy_status (str): Privacy status of the uploaded video.
+
+    Returns:
+        Pipeline: Pipeline with `url` and `youtube` inputs.
+    """
+    seed = random.randint(0, 100000) if seed is None else seed
 
-async def main():
-    url = ""
-    num_images = 2
-    seed = random.randint(0, 100000)
-
-    title_desc_file = "./src/bot/title_desc.json"
-    output_audio_file = "./src/bot/output_audio.wav"
-    output_img_folder = "./src/bot/output_imgs"
-    output_video_file = "./src/bot/output_video.mp4"
-
-    yt_privacy_status = "private"
-
-    article = extract_news_content(url)
-
-    print(f"Article: {article}")
-    print("*" * 100)
-    script = generate_script(article)
-
-    print(f"Script: {script}")
-    print("*" * 100)
-    prompts = generate_prompts(script)
-    print(f"Prompts: {prompts}")
-    print("*" * 100)
-
-    title_desc = generate_title_desc(script)
-    with open(title_desc_file, "w") as f:
-        f.write(json.dumps(title_desc, indent=4))
-    print(f"Title and Description: {title_desc}")
-    print("*" * 100)
-    generate_audio(script, save_audio=True, output_file=output_audio_file)
-    print("*" * 100)
-
-    # Generate images based on prompts
     with open(config.get("comfyui_api_json_path")) as f:
         workflow = json.loads(f.read())
-    for prompt in prompts:
-        # Update the workflow details
-        workflow["6"]["inputs"]["text"] = prompt
-        workflow["38"]["inputs"]["filename_prefix"] = "test_temp/t2"
-        workflow["27"]["inputs"]["batch_size"] = num_images
-        workflow["31"]["inputs"]["seed"] = seed
-
-        images = await generate_images(
-            workflow, save_images=True, output_folder=output_img_folder
+
+    # Everything that changes an LLM answer besides its input text
+    gpt_settings = {
+        "model": os.getenv("OPENAI_DEPLOYMENT_NAME"),
+        "temperature": config.get("temperature"),
+    }
+
+    def fetch_article(url):
+        article = extract_news_content(url, session=http_session)
+        if "error" in article:
+            raise RuntimeError(f"Failed to fetch {url}: {article['error']}")
+        print(f"Article: {article}")
+        print("*" * 100)
+        return article
+
+    def write_script(article, workdir):
+        script = generate_script(article)
+        print(f"Script: {script}")
+        print("*" * 100)
+        return script
+
+    def write_prompts(script, workdir):
+        prompts = generate_prompts(script)
+        print(f"Prompts: {prompts}")
+        print("*" * 100)
+        return prompts
+
+    def write_title_desc(script, workdir):
+        title_desc = generate_title_desc(script)
+        with open(os.path.join(workdir, "title_desc.json"), "w") as f:
+            f.write(json.dumps(title_desc, indent=4))
+        print(f"Title and Description: {title_desc}")
+        print("*" * 100)
+        return title_desc
+
+    def synthesize_audio(script, workdir):
+        output_audio_file = os.path.join(workdir, "output_audio.wav")
+        generate_audio(
+            script,
+            save_audio=True,
+            output_file=output_audio_file,
+            kokoro=kokoro,
+            # Without the artifact cache, audio is regenerated as well
+            use_cache=cache is not None,
         )
+        print("*" * 100)
+        return output_audio_file
+
+    async def render_images(prompts, workdir):
+        output_img_folder = os.path.join(workdir, "output_imgs")
+        # Generate images based on prompts
+        workflows = []
+        for prompt in prompts:
+            # Update the workflow details
+            prompt_workflow = copy.deepcopy(workflow)
+            prompt_workflow["6"]["inputs"]["text"] = prompt
+            prompt_workflow["38"]["inputs"][
+                "filename_prefix"
+            ] = "test_temp/t2"
+            prompt_workflow["27"]["inputs"]["batch_size"] = num_images
+            prompt_workflow["31"]["inputs"]["seed"] = seed
+            workflows.append(prompt_workflow)
+
+        # All prompts are queued up front, so the server renders the next
+        # one while the images of the previous one are downloaded
+        if comfyui is None:
+            async with ComfyUIPool() as pool:
+                images = await pool.generate_images(
+                    workflows,
+                    save_images=True,
+                    output_folder=output_img_folder,
+                )
+        else:
+            images = await comfyui.generate_images(
+                workflows, save_images=True, output_folder=output_img_folder
+            )
         print("Images received:", images)
+        return output_img_folder
+
+    def create_video(img_folder, audio_file, workdir):
+        output_video_file = os.path.join(workdir, "output_video.mp4")
+        create_video_with_audio(img_folder, audio_file, output_video_file)
+        return output_video_file
+
+    def upload(youtube_service, video_file, title_desc, workdir):
+        # The video ID is the artifact, so a rerun does not upload again
+        return upload_video(
+            youtube_service,
+            video_file,
+            title_desc["title"],
+            title_desc["description"],
+            yt_privacy_status,
+        )
+
+    # Cache keys of the resumable stages. File outputs of upstream stages are
+    # paths inside their own content-addressed folders, so hashing the paths
+    # hashes everything they were built from.
+    def script_key(article):
+        return {
+            "article": article,
+            "prompts": [script_gen_sys_prompt, script_gen_human_prompt],
+            **gpt_settings,
+        }
+
+    def prompts_key(script):
+        return {
+            "script": script,
+            "prompts": [prompts_gen_sys_prompt, prompts_gen_human_prompt],
+            **gpt_settings,
+        }
+
+    def title_desc_key(script):
+        return {
+            "script": script,
+            "prompts": [title_gen_sys_prompt, title_gen_human_prompt],
+            **gpt_settings,
+        }
+
+    def audio_key(script):
+        # The model synthesize_audio would use, so that changing the TTS
+        # settings does not serve stale audio
+        voice_model = kokoro or get_voice_model()
+        return {
+            "script": script,
+            "model": voice_model.model_version,
+            "voice": voice_model.voice_name,
+        }
+
+    def images_key(prompts):
+        return {
+            "prompts": prompts,
+            "workflow": workflow,
+            "seed": seed,
+            "num_images": num_images,
+        }
+
+    def video_key(img_folder, audio_file):
+        return {"images": img_folder, "audio": audio_file}
+
+    def upload_key(youtube_service, video_file, title_desc):
+        return {"video": video_file, "title_desc": title_desc}
+
+    # Stages only wait for the outputs they need, so prompts, title and
+    # description and TTS run concurrently once the script exists.
+    return (
+        Pipeline(
+            inputs=("url", "youtube"),
+            limits=limits,
+            cache=cache,
+            workdir=output_dir,
+        )
+        .add_stage("article", fetch_article, deps=("url",))
+        .add_stage(
+            "script", write_script, deps=("article",), cache_key=script_key
+        )
+        .add_stage(
+            "prompts", write_prompts, deps=("script",), cache_key=prompts_key
+        )
+        .add_stage(
+            "title_desc",
+            write_title_desc,
+            deps=("script",),
+            cache_key=title_desc_key,
+        )
+        .add_stage(
+            "audio", synthesize_audio, deps=("script",), cache_key=audio_key
+        )
+        .add_stage(
+            "images", render_images, deps=("prompts",), cache_key=images_key
+        )
+        .add_stage(
+            "video",
+            create_video,
+            deps=("images", "audio"),
+            cache_key=video_key,
+        )
+        .add_stage(
+            "upload",
+            upload,
+            deps=("youtube", "video", "title_desc"),
+            cache_key=upload_key,
+        )
+    )
+
+
+def article_output_dir(url: str) -> str:
+    """
+    Returns the output folder of an article, derived from its URL so that
+    articles processed concurrently never share files.
+
+    Args:
+        url (str): URL of the news article.
+
+    Returns:
+        str: Path of the article's output folder.
+    """
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(OUTPUT_DIR, digest)
+
+
+def article_seed(url: str) -> int:
+    """
+    Returns a stable image generation seed for an article, so that a rerun
+    finds the cached images of the previous run.
+
+    Args:
+        url (str): URL of the news article.
+
+    Returns:
+        int: Seed in the same range as the random default.
+    """
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return int(digest, 16) % 100000
+
+
+async def run_batch(
+    urls,
+    max_in_flight: int = None,
+    stage_limits: dict = None,
+    use_cache: bool = True,
+) -> dict:
+    """
+    Creates and uploads a video for every URL. The TTS model, the article
+    HTTP session, the ComfyUI servers and the YouTube service are created
+    once and shared by all articles.
+
+    Args:
+        urls (list or asyncio.Queue): URLs to process. A queue is consumed
+                                      until a `None` sentinel is received.
+        max_in_flight (int): Number of articles processed concurrently.
+        stage_limits (dict): Maximum number of concurrent runs per stage
+                             name, across all articles in flight.
+        use_cache (bool): Whether to reuse the stored outputs of earlier
+                          runs and store the outputs of this one.
+
+    Returns:
+        dict: The error message for every URL that failed, keyed by URL.
+    """
+    if max_in_flight is None:
+        max_in_flight = config.get("max_articles_in_flight", 1)
+    if stage_limits is None:
+        stage_limits = config.get("stage_concurrency", {})
 
-    # Create Video
-    create_video_with_audio(
-        output_img_folder, output_audio_file, output_video_file
+    if isinstance(urls, asyncio.Queue):
+        queue = urls
+    else:
+        queue = asyncio.Queue()
+        for url in urls:
+            queue.put_nowait(url)
+        queue.put_nowait(None)
+
+    limits = {
+        name: asyncio.Semaphore(limit) for name, limit in stage_limits.items()
+    }
+    cache = ArtifactCache(ARTIFACT_CACHE_DIR) if use_cache else None
+    http_session = None
+    comfyui = None
+    kokoro = None
+    youtube_service = None
+    failures = {}
+
+    async def worker():
+        while True:
+            url = await queue.get()
+            if url is None:
+                # Let the other workers see the sentinel as well
+                queue.put_nowait(None)
+                return
+
+            output_dir = article_output_dir(url)
+            os.makedirs(output_dir, exist_ok=True)
+            logger.info(f"Processing {url} into {output_dir}")
+            pipeline = build_pipeline(
+                output_dir,
+                http_session=http_session,
+                kokoro=kokoro,
+                comfyui=comfyui,
+                limits=limits,
+                cache=cache,
+                seed=article_seed(url) if cache else None,
+            )
+            try:
+                await pipeline.run(url=url, youtube=youtube_service)
+            except Exception as e:
+                logger.error(f"Failed to create video for {url}: {e}")
+                failures[url] = str(e)
+
+    try:
+        http_session = requests.Session()
+        comfyui = ComfyUIPool()
+        # Loaded before any thread is started, as the TTS workers are
+        # forked when the model is loaded
+        kokoro = get_voice_model()
+        youtube_service = await asyncio.to_thread(get_authenticated_service)
+        await asyncio.gather(*(worker() for _ in range(max_in_flight)))
+    finally:
+        if http_session is not None:
+            http_session.close()
+        if comfyui is not None:
+            await comfyui.close()
+
+    return failures
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Create and upload YouTube videos from news articles."
+    )
+    parser.add_argument("urls", nargs="*", help="News article URLs.")
+    parser.add_argument(
+        "--urls-file", help="File with one news article URL per line."
     )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=None,
+        help="Number of articles processed concurrently.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Regenerate every stage instead of resuming from artifacts.",
+    )
+    return parser.parse_args()
 
-    # Authenticate and upload
-    youtube_service = get_authenticated_service()
-    upload_video(
-        youtube_service,
-        output_video_file,
-        title_desc["title"],
-        title_desc["description"],
-        yt_privacy_status,
+
+async def main():
+    args = parse_args()
+    urls = list(args.urls)
+    if args.urls_file:
+        with open(args.urls_file) as f:
+            urls.extend(line.strip() for line in f if line.strip())
+    if not urls:
+        # Nothing to do, so the TTS model and YouTube auth are not loaded
+        logger.warning("No article URLs given")
+        return
+
+    failures = await run_batch(
+        urls, max_in_flight=args.max_in_flight, use_cache=not args.no_cache
+    )
+    logger.info(
+        f"Batch finished: {len(urls) - len(failures)} of {len(urls)} "
+        "videos created"
     )
 
 
 if __name__ == "__main__":
-    import asyncio
-
     asyncio.run(main())
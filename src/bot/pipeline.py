@@ -0,0 +1,193 @@
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger()
+
+
+class Stage:
+    """
+    A single step of the video pipeline and the stages it depends on.
+    """
+
+    def __init__(self, name: str, func, deps: tuple = (), cache_key=None):
+        """
+        Args:
+            name (str): Unique name of the stage.
+            func (callable): Function producing the stage output. It receives
+                             the outputs of `deps` as positional arguments.
+                             Coroutine functions run on the event loop,
+                             regular functions run on a worker thread.
+            deps (tuple): Names of the stages (or pipeline inputs) whose
+                          outputs are passed to `func`.
+            cache_key (callable): Optional function receiving the same
+                                  arguments as `func` and returning a dict of
+                                  everything the output depends on. Stages
+                                  with a cache key are resumable: `func` must
+                                  write its files into the `workdir` keyword
+                                  argument and return JSON serializable data.
+        """
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.cache_key = cache_key
+
+    @property
+    def is_async(self) -> bool:
+        return asyncio.iscoroutinefunction(self.func)
+
+    def __repr__(self) -> str:
+        return f"Stage(name={self.name!r}, deps={self.deps})"
+
+
+class Pipeline:
+    """
+    Dependency-graph executor for the video pipeline.
+
+    Every stage starts as soon as all of its dependencies are done, so
+    independent branches (e.g. TTS and image generation) run concurrently
+    and the wall-clock time is bounded by the longest branch.
+    """
+
+    def __init__(
+        self,
+        inputs: tuple = (),
+        limits: dict = None,
+        cache=None,
+        workdir: str = None,
+    ):
+        """
+        Args:
+            inputs (tuple): Names of the values passed to `run` that stages
+                            can depend on.
+            limits (dict): Optional semaphores keyed by stage name. They can
+                           be shared between pipelines to cap how many runs
+                           of a stage are in flight at once.
+            cache (ArtifactCache): Optional store for the outputs of stages
+                                   with a cache key. Stages whose artifact
+                                   already exists are skipped.
+            workdir (str): Folder given to stages with a cache key when no
+                           cache is used.
+        """
+        self.inputs = tuple(inputs)
+        self.limits = limits or {}
+        self.cache = cache
+        self.workdir = workdir
+        self.stages = {}
+
+    def add_stage(
+        self, name: str, func, deps: tuple = (), cache_key=None
+    ) -> "Pipeline":
+        """
+        Registers a stage. Dependencies must be declared before the stages
+        that use them, which keeps the graph acyclic.
+
+        Args:
+            name (str): Unique name of the stage.
+            func (callable): Function producing the stage output.
+            deps (tuple): Names of stages or inputs the stage depends on.
+            cache_key (callable): Optional function returning the inputs the
+                                  stage output is keyed by, see `Stage`.
+
+        Returns:
+            Pipeline: The pipeline itself, to allow chaining.
+        """
+        if name in self.stages or name in self.inputs:
+            raise ValueError(f"Duplicate stage name: {name}")
+        for dep in deps:
+            if dep not in self.stages and dep not in self.inputs:
+                raise ValueError(f"Unknown dependency {dep!r} for {name!r}")
+        self.stages[name] = Stage(name, func, deps, cache_key)
+        return self
+
+    async def _run_stage(self, stage: Stage, futures: dict):
+        args = [await futures[dep] for dep in stage.deps]
+
+        if stage.cache_key is not None and self.cache is not None:
+            key = self.cache.key(stage.cache_key(*args))
+            found, result = self.cache.load(stage.name, key)
+            if found:
+                logger.info(f"Stage '{stage.name}' skipped, artifact {key}")
+                return result
+            workdir = self.cache.workdir(stage.name, key)
+            result = await self._limited_call(stage, args, workdir)
+            self.cache.save(stage.name, key, result)
+            return result
+
+        workdir = self.workdir if stage.cache_key is not None else None
+        return await self._limited_call(stage, args, workdir)
+
+    async def _limited_call(self, stage: Stage, args: list, workdir: str):
+        limit = self.limits.get(stage.name)
+        if limit is None:
+            return await self._call_stage(stage, args, workdir)
+        async with limit:
+            return await self._call_stage(stage, args, workdir)
+
+    async def _call_stage(self, stage: Stage, args: list, workdir: str):
+        kwargs = {} if workdir is None else {"workdir": workdir}
+        logger.info(f"Stage '{stage.name}' started")
+        start = time.perf_counter()
+        if stage.is_async:
+            result = await stage.func(*args, **kwargs)
+        else:
+            result = await self._call_in_thread(stage, args, kwargs)
+        logger.info(
+            f"Stage '{stage.name}' finished in "
+            f"{time.perf_counter() - start:.2f} seconds"
+        )
+        return result
+
+    @staticmethod
+    async def _call_in_thread(stage: Stage, args: list, kwargs: dict):
+        thread = asyncio.ensure_future(
+            asyncio.to_thread(stage.func, *args, **kwargs)
+        )
+        try:
+            return await asyncio.shield(thread)
+        except asyncio.CancelledError:
+            # A thread cannot be stopped, so the stage keeps its limit until
+            # the call returns, instead of letting another one start next to
+            # it
+            logger.info(f"Stage '{stage.name}' cancelled, waiting for it")
+            await asyncio.wait({thread})
+            if not thread.cancelled():
+                thread.exception()
+            raise
+
+    async def run(self, **inputs) -> dict:
+        """
+        Runs all stages, each one as soon as its dependencies are available.
+
+        Args:
+            **inputs: Values for the pipeline inputs.
+
+        Returns:
+            dict: Outputs of every input and stage, keyed by name.
+        """
+        missing = set(self.inputs) - set(inputs)
+        if missing:
+            raise ValueError(f"Missing pipeline inputs: {sorted(missing)}")
+
+        loop = asyncio.get_running_loop()
+        futures = {}
+        for name in self.inputs:
+            futures[name] = loop.create_future()
+            futures[name].set_result(inputs[name])
+        for name, stage in self.stages.items():
+            futures[name] = asyncio.ensure_future(
+                self._run_stage(stage, futures)
+            )
+
+        tasks = [futures[name] for name in self.stages]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception:
+            # Async stages stop at once, stages running in a thread are
+            # waited for, so nothing outlives the run
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return {name: future.result() for name, future in futures.items()}
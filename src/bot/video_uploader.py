@@ -103,11 +103,14 @@ def upload_video(
         Defaults to "private".
 
     Returns:
-        None
+        str: ID of the uploaded video.
+
+    Raises:
+        FileNotFoundError: If the video file does not exist.
+        googleapiclient.errors.HttpError: If the upload fails.
     """
     if not os.path.exists(file_path):
-        logger.error(f"The file '{file_path}' does not exist.")
-        return
+        raise FileNotFoundError(f"The file '{file_path}' does not exist.")
 
     body = {
         "snippet": {
@@ -125,14 +128,12 @@ def upload_video(
             part="snippet,status", body=body, media_body=media_body
         )
         response = request.execute()
-        logger.info(
-            f"Video uploaded successfully. Video ID: {response['id']}."
-        )
-        logger.info(
-            f"Video URL: https://www.youtube.com/watch?v={response['id']}"
-        )
     except Exception as e:
         logger.error(f"An error occurred during upload: {e}")
+        raise
+    logger.info(f"Video uploaded successfully. Video ID: {response['id']}.")
+    logger.info(f"Video URL: https://www.youtube.com/watch?v={response['id']}")
+    return response["id"]
 
 
 def get_video_details(youtube, video_id: str):
@@ -0,0 +1,95 @@
+"""
+Tests of the ComfyUI client against a local aiohttp server that stands in
+for the /history and /view endpoints of ComfyUI.
+
+Run from the repository root:
+    poetry run python -m unittest src.tests.test_image_gen
+"""
+import os
+import tempfile
+import unittest
+from aiohttp import web
+from bot.image_gen import ComfyUIClient
+
+NUM_IMAGES = 2
+PROMPT_ID = "prompt"
+
+
+def history_outputs():
+    # Like flux_dev.json: a PreviewImage and a SaveImage node fed by the
+    # same decoded images
+    return {
+        "37": {
+            "images": [
+                {"filename": f"preview_{i}.png", "subfolder": "",
+                 "type": "temp"}
+                for i in range(NUM_IMAGES)
+            ]
+        },
+        "38": {
+            "images": [
+                {"filename": f"image_{i}.png", "subfolder": "",
+                 "type": "output"}
+                for i in range(NUM_IMAGES)
+            ]
+        },
+    }
+
+
+class DownloadOutputsTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.views = []
+        app = web.Application()
+        app.add_routes(
+            [
+                web.get("/history/{prompt_id}", self.history),
+                web.get("/view", self.view),
+            ]
+        )
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, "127.0.0.1", 0).start()
+        port = self.runner.addresses[0][1]
+        self.client = ComfyUIClient(f"127.0.0.1:{port}")
+        self.client.open_session()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.output_folder = tmp.name
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.runner.cleanup()
+
+    async def history(self, request):
+        prompt_id = request.match_info["prompt_id"]
+        return web.json_response({prompt_id: {"outputs": history_outputs()}})
+
+    async def view(self, request):
+        self.views.append(request.query["filename"])
+        return web.Response(body=request.query["filename"].encode())
+
+    async def test_saves_each_image_once(self):
+        outputs = await self.client.download_outputs(
+            PROMPT_ID, self.output_folder, prompt_index=3
+        )
+
+        self.assertEqual(
+            sorted(os.listdir(self.output_folder)),
+            [f"img_003_{i:02d}.png" for i in range(NUM_IMAGES)],
+        )
+        self.assertEqual(
+            self.views, [f"image_{i}.png" for i in range(NUM_IMAGES)]
+        )
+        self.assertEqual(list(outputs), ["38"])
+        self.assertEqual(outputs["38"][1].read(), b"image_1.png")
+
+    async def test_keeps_images_in_memory_without_folder(self):
+        outputs = await self.client.download_outputs(PROMPT_ID)
+
+        self.assertEqual(len(outputs["38"]), NUM_IMAGES)
+        self.assertIsNone(outputs["38"][0].path)
+        self.assertEqual(outputs["38"][0].read(), b"image_0.png")
+
+
+if __name__ == "__main__":
+    unittest.main()
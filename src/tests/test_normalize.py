@@ -0,0 +1,48 @@
+"""
+Golden tests of the TTS text normalization. The expected outputs were
+recorded from the original sequential-regex implementation, see
+benchmarks/tts/normalize.py.
+
+Run from the repository root, espeak-ng must be installed:
+    poetry run python -m unittest src.tests.test_normalize
+"""
+import os
+import json
+import unittest
+from tts.kokoro import normalize_text, postprocess_phonemes
+
+GOLDEN_FILE = os.path.join(
+    os.path.dirname(__file__),
+    "..",
+    "..",
+    "benchmarks",
+    "tts",
+    "normalize_golden.json",
+)
+
+
+class NormalizeGoldenTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(GOLDEN_FILE) as f:
+            cls.golden = json.load(f)
+
+    def test_normalize_text(self):
+        mismatches = [
+            (text, expected, normalize_text(text))
+            for text, expected in self.golden["normalize_text"]
+            if normalize_text(text) != expected
+        ]
+        self.assertEqual(mismatches[:5], [])
+
+    def test_postprocess_phonemes(self):
+        mismatches = [
+            (ps, lang, expected, postprocess_phonemes(ps, lang))
+            for ps, lang, expected in self.golden["postprocess_phonemes"]
+            if postprocess_phonemes(ps, lang) != expected
+        ]
+        self.assertEqual(mismatches[:5], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
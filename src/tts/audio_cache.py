@@ -0,0 +1,194 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger()
+
+# Entries are evicted down to this share of the limits, so that an eviction
+# pass is not needed on every store
+EVICT_TO = 0.9
+MAX_FILES = 100000
+
+
+class AudioCache:
+    """
+    Persistent store of synthesized waveforms of recurring text pieces.
+
+    Waveforms are stored as float32 `.npy` files under
+    `<root>/<key[:2]>/<key>.npy`, where the key is a hash of everything the
+    audio depends on: the phonemes, the voice, the speed and the model.
+
+    Most pieces of a script are never spoken again, so a piece is only
+    admitted once it recurs: its first sighting leaves an empty `.seen`
+    marker, and only a piece with a marker is synthesized on its own and
+    stored. Markers and waveforms are evicted least recently used first
+    once the cache outgrows its size or file limit.
+    """
+
+    def __init__(self, root, max_bytes=None, max_files=MAX_FILES):
+        """
+        Args:
+            root (str): Folder where waveforms are stored.
+            max_bytes (int): Size limit of the stored files, unbounded if
+                             None.
+            max_files (int): Limit on the number of stored files, markers
+                             included.
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._lock = threading.Lock()
+        # Totals of the stored files, counted on the first store
+        self._num_bytes = None
+        self._num_files = None
+
+    @staticmethod
+    def key(phonemes, voice, speed, model_version):
+        """
+        Hashes the inputs of a synthesized piece.
+
+        Args:
+            phonemes (str): Phonemes of the piece.
+            voice (str): Name of the voice.
+            speed (float): Speaking speed.
+            model_version (str): Identifier of the model weights and backend.
+
+        Returns:
+            str: Hex digest identifying the waveform.
+        """
+        payload = json.dumps(
+            [phonemes, voice, float(speed), model_version], ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, key, extension=".npy"):
+        return os.path.join(self.root, key[:2], f"{key}{extension}")
+
+    def __contains__(self, key):
+        return os.path.exists(self.path(key))
+
+    def recurring(self, key):
+        """
+        Tells whether a piece was met before, and records that it was met.
+
+        Args:
+            key (str): Waveform key of the piece.
+
+        Returns:
+            bool: True if the waveform is stored or the piece was seen
+                  before, in which case it is worth synthesizing alone.
+        """
+        if key in self:
+            return True
+        marker = self.path(key, ".seen")
+        if os.path.exists(marker):
+            self._touch(marker)
+            return True
+        try:
+            os.makedirs(os.path.dirname(marker), exist_ok=True)
+            open(marker, "wb").close()
+            self._added(0)
+        except OSError as e:
+            logger.warning(f"Could not mark text piece as seen: {e}")
+        return False
+
+    def load(self, key):
+        """
+        Loads a stored waveform.
+
+        Args:
+            key (str): Waveform key.
+
+        Returns:
+            numpy array: 1D float audio, or None if it is not stored.
+        """
+        path = self.path(key)
+        try:
+            audio = np.load(path)
+        except (OSError, ValueError):
+            return None
+        self._touch(path)
+        return audio
+
+    def save(self, key, audio):
+        """
+        Stores a waveform. Failures are logged, since the cache is only an
+        optimization.
+
+        Args:
+            key (str): Waveform key.
+            audio (numpy array): 1D float audio.
+        """
+        path = self.path(key)
+        tmp_path = f"{path}.tmp.npy"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            np.save(tmp_path, np.asarray(audio, dtype=np.float32))
+            # Atomic, so readers never see a partially written waveform
+            os.replace(tmp_path, path)
+            self._added(os.path.getsize(path))
+            marker = self.path(key, ".seen")
+            if os.path.exists(marker):
+                os.remove(marker)
+                self._added(0, -1)
+        except OSError as e:
+            logger.warning(f"Could not store synthesized audio: {e}")
+
+    @staticmethod
+    def _touch(path):
+        # The modification time orders entries for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for folder in os.scandir(self.root):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if entry.name.endswith((".npy", ".seen")):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _added(self, num_bytes, num_files=1):
+        with self._lock:
+            if self._num_bytes is None:
+                entries = self._entries()
+                self._num_bytes = sum(size for _, size, _ in entries)
+                self._num_files = len(entries)
+            else:
+                self._num_bytes += num_bytes
+                self._num_files += num_files
+            if self._over_limit(1.0):
+                self._evict()
+
+    def _over_limit(self, share):
+        if self.max_bytes is not None:
+            if self._num_bytes > self.max_bytes * share:
+                return True
+        return self._num_files > self.max_files * share
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        self._num_bytes = sum(size for _, size, _ in entries)
+        self._num_files = len(entries)
+        evicted = 0
+        for _, size, path in entries:
+            if not self._over_limit(EVICT_TO):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._num_bytes -= size
+            self._num_files -= 1
+            evicted += 1
+        logger.info(f"Evicted {evicted} entries from the TTS audio cache")
@@ -0,0 +1,173 @@
+import os
+import argparse
+import torch
+import torch.nn as nn
+from .model import AdaLayerNorm, build_model
+
+DURATION_GRAPH = "duration.pt"
+SYNTHESIS_GRAPH = "synthesis.pt"
+
+
+def default_export_dir(model_path):
+    return f"{os.path.splitext(model_path)[0]}.torchscript"
+
+
+class DurationGraph(nn.Module):
+    """
+    Token-level half of Kokoro for a single unpadded sequence: PLBERT, the
+    duration encoder and predictor, and the text encoder. With a batch of
+    one there is no padding, so the packed sequences and masks of the
+    training code are replaced by plain calls that trace with a dynamic
+    sequence length.
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.bert = model.bert
+        self.bert_encoder = model.bert_encoder
+        self.predictor = model.predictor
+        self.text_encoder = model.text_encoder
+
+    def encode_durations(self, d_en, s):
+        x = d_en.permute(2, 0, 1)
+        style = s.expand(x.shape[0], x.shape[1], -1)
+        x = torch.cat([x, style], axis=-1)
+        x = x.transpose(0, 1).transpose(-1, -2)
+        for block in self.predictor.text_encoder.lstms:
+            if isinstance(block, AdaLayerNorm):
+                x = block(x.transpose(-1, -2), s).transpose(-1, -2)
+                x = torch.cat([x, style.permute(1, -1, 0)], axis=1)
+            else:
+                x, _ = block(x.transpose(-1, -2))
+                x = x.transpose(-1, -2)
+        return x.transpose(-1, -2)
+
+    def encode_text(self, tokens):
+        x = self.text_encoder.embedding(tokens).transpose(1, 2)
+        for c in self.text_encoder.cnn:
+            x = c(x)
+        x, _ = self.text_encoder.lstm(x.transpose(1, 2))
+        return x.transpose(-1, -2)
+
+    def forward(self, tokens, ref_s, speed):
+        bert_dur = self.bert(tokens, attention_mask=torch.ones_like(tokens))
+        d_en = self.bert_encoder(bert_dur).transpose(-1, -2)
+        s = ref_s[:, 128:]
+        d = self.encode_durations(d_en, s)
+        x, _ = self.predictor.lstm(d)
+        duration = self.predictor.duration_proj(x)
+        duration = torch.sigmoid(duration).sum(axis=-1) / speed
+        pred_dur = torch.round(duration).clamp(min=1).long()
+        return pred_dur[0], d, self.encode_text(tokens)
+
+
+class SynthesisGraph(nn.Module):
+    """
+    Frame-level half of Kokoro: F0/N prediction and the iSTFTNet decoder,
+    taking token features already expanded to frames.
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.predictor = model.predictor
+        self.decoder = model.decoder
+
+    def forward(self, en, asr, ref_s):
+        F0_pred, N_pred = self.predictor.F0Ntrain(en, ref_s[:, 128:])
+        return self.decoder(asr, F0_pred, N_pred, ref_s[:, :128]).squeeze()
+
+
+class TorchScriptKokoro:
+    """
+    Kokoro model running the exported TorchScript graphs. Only the frame
+    expansion between the two graphs runs in eager mode.
+    """
+
+    def __init__(self, export_dir, device):
+        self.device = device
+        self.duration = torch.jit.load(
+            os.path.join(export_dir, DURATION_GRAPH), map_location=device
+        )
+        self.synthesis = torch.jit.load(
+            os.path.join(export_dir, SYNTHESIS_GRAPH), map_location=device
+        )
+
+    @torch.inference_mode()
+    def forward_batch(self, tokens_list, ref_s, speed):
+        speed = torch.tensor(float(speed), device=self.device)
+        outputs = []
+        for i, item in enumerate(tokens_list):
+            tokens = torch.zeros(1, len(item) + 2, dtype=torch.long)
+            tokens[0, 1:-1] = torch.as_tensor(item)
+            tokens = tokens.to(self.device)
+            pred_dur, d, t_en = self.duration(tokens, ref_s[i: i + 1], speed)
+            en = d[0].repeat_interleave(pred_dur, dim=0).T.unsqueeze(0)
+            asr = t_en.repeat_interleave(pred_dur, dim=-1)
+            out = self.synthesis(en, asr, ref_s[i: i + 1])
+            outputs.append(out.cpu().numpy())
+        return outputs
+
+
+@torch.no_grad()
+def export_torchscript(model, export_dir, num_tokens=64):
+    """
+    Traces the Kokoro model into two TorchScript graphs with dynamic
+    sequence lengths and saves them to export_dir. The graphs are bound to
+    the device the model is on.
+
+    Args:
+        model (Munch): Model built by build_model.
+        export_dir (str): Folder to write the graphs to.
+        num_tokens (int): Length of the example input used for tracing.
+
+    Returns:
+        str: The export folder.
+    """
+    device = next(model.bert.parameters()).device
+    duration = DurationGraph(model).eval()
+    synthesis = SynthesisGraph(model).eval()
+
+    generator = torch.Generator().manual_seed(0)
+    tokens = torch.randint(1, 178, (1, num_tokens), generator=generator)
+    tokens = tokens.to(device)
+    ref_s = torch.randn(1, 256, generator=generator).to(device)
+    speed = torch.tensor(1.0, device=device)
+
+    traced_duration = torch.jit.trace(
+        duration, (tokens, ref_s, speed), check_trace=False
+    )
+    pred_dur, d, t_en = duration(tokens, ref_s, speed)
+    en = d[0].repeat_interleave(pred_dur, dim=0).T.unsqueeze(0)
+    asr = t_en.repeat_interleave(pred_dur, dim=-1)
+    # The decoder samples noise, so traces cannot be compared run to run
+    traced_synthesis = torch.jit.trace(
+        synthesis, (en, asr, ref_s), check_trace=False
+    )
+
+    os.makedirs(export_dir, exist_ok=True)
+    traced_duration.save(os.path.join(export_dir, DURATION_GRAPH))
+    traced_synthesis.save(os.path.join(export_dir, SYNTHESIS_GRAPH))
+    print(f"TorchScript graphs saved to {export_dir}")
+    return export_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export the Kokoro model to TorchScript."
+    )
+    parser.add_argument(
+        "--model-path", required=True, help="Path to the model file."
+    )
+    parser.add_argument(
+        "--export-dir",
+        help="Output folder, next to the model file by default.",
+    )
+    parser.add_argument(
+        "--device", default="cpu", help="Device the graphs will run on."
+    )
+    args = parser.parse_args()
+
+    export_torchscript(
+        build_model(args.model_path, args.device, fuse=True),
+        args.export_dir or default_export_dir(args.model_path),
+    )
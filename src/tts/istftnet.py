@@ -242,6 +242,11 @@ class SineGen(torch.nn.Module):
         self.voiced_threshold = voiced_threshold
         self.flag_for_pulse = flag_for_pulse
         self.upsample_scale = upsample_scale
+        self.register_buffer(
+            "harmonics",
+            torch.arange(1, self.dim + 1, dtype=torch.float32).view(1, 1, -1),
+            persistent=False,
+        )
 
     def _f02uv(self, f0):
         # generate uv signal
@@ -309,14 +314,24 @@ class SineGen(torch.nn.Module):
 
             # get the instantanouse phase
             tmp_cumsum = torch.cumsum(rad_values, dim=1)
-            # different batch needs to be processed differently
-            for idx in range(f0_values.shape[0]):
-                temp_sum = tmp_cumsum[idx, u_loc[idx, :, 0], :]
-                temp_sum[1:, :] = temp_sum[1:, :] - temp_sum[0:-1, :]
-                # stores the accumulation of i.phase within
-                # each voiced segments
-                tmp_cumsum[idx, :, :] = 0
-                tmp_cumsum[idx, u_loc[idx, :, 0], :] = temp_sum
+            # stores the accumulation of i.phase within each voiced segment
+            # at the step that ends it: the cumsum at that step minus the
+            # cumsum at the end of the previous voiced segment, found for
+            # all batches at once by forward-filling the segment ends
+            u_loc = u_loc[:, :, :1]
+            steps = torch.arange(
+                u_loc.shape[1], device=u_loc.device
+            ).view(1, -1, 1)
+            last_loc = torch.where(u_loc, steps, -1).cummax(dim=1).values
+            prev_loc = torch.roll(last_loc, shifts=1, dims=1)
+            prev_loc[:, 0, :] = -1
+            prev_sum = torch.gather(
+                tmp_cumsum,
+                1,
+                prev_loc.clamp(min=0).expand(-1, -1, tmp_cumsum.shape[2]),
+            )
+            prev_sum = prev_sum * (prev_loc >= 0)
+            tmp_cumsum = (tmp_cumsum - prev_sum) * u_loc
 
             # rad_values - tmp_cumsum: remove the accumulation of i.phase
             # within the previous voiced segment.
@@ -326,6 +341,46 @@ class SineGen(torch.nn.Module):
             sines = torch.cos(i_phase * 2 * np.pi)
         return sines
 
+    def _f02sine_frames(self, f0_values):
+        """f0_values: (batchsize, frames, dim), F0 at frame rate
+        Fast path of _f02sine for F0 that is constant over each block of
+        upsample_scale samples, as produced by nearest upsampling. The
+        phase increments are computed per frame and only the phase is
+        upsampled, which gives the same sines as downsampling the
+        increments from the sample rate. The random initial phase is
+        dropped, as it only affects the first sample, which the
+        downsampling in _f02sine never reads.
+        """
+        rad_values = (f0_values / self.sampling_rate) % 1
+        phase = torch.cumsum(rad_values, dim=1) * (2 * np.pi)
+        phase = torch.nn.functional.interpolate(
+            phase.transpose(1, 2) * self.upsample_scale,
+            scale_factor=self.upsample_scale,
+            mode="linear",
+        ).transpose(1, 2)
+        return phase.sin_()
+
+    def forward_frames(self, f0):
+        """sine_tensor, uv, noise = forward_frames(f0)
+        Same as forward(upsampled f0), where f0 is at frame rate and forward
+        would receive it nearest-upsampled by upsample_scale.
+        input F0: tensor(batchsize, frames, dim=1)
+        output sine_tensor: tensor(batchsize, frames * upsample_scale, dim)
+        output uv: tensor(batchsize, frames * upsample_scale, 1)
+        """
+        if self.flag_for_pulse:
+            f0 = f0.repeat_interleave(self.upsample_scale, dim=1)
+            return self(f0)
+
+        fn = f0 * self.harmonics
+        sine_waves = self._f02sine_frames(fn).mul_(self.sine_amp)
+        uv = self._f02uv(f0).repeat_interleave(self.upsample_scale, dim=1)
+
+        noise_amp = uv * self.noise_std + (1 - uv) * self.sine_amp / 3
+        noise = noise_amp * torch.randn_like(sine_waves)
+        sine_waves = sine_waves.mul_(uv).add_(noise)
+        return sine_waves, uv, noise
+
     def forward(self, f0):
         """sine_tensor, uv = forward(f0)
         input F0: tensor(batchsize=1, length, dim=1)
@@ -337,12 +392,7 @@ class SineGen(torch.nn.Module):
         #     f0.shape[0], f0.shape[1], self.dim, device=f0.device
         # )
         # fundamental component
-        fn = torch.multiply(
-            f0,
-            torch.FloatTensor([[range(1, self.harmonic_num + 2)]]).to(
-                f0.device
-            ),
-        )
+        fn = torch.multiply(f0, self.harmonics)
 
         # generate sine waveforms
         sine_waves = self._f02sine(fn) * self.sine_amp
@@ -426,6 +476,20 @@ class SourceModuleHnNSF(torch.nn.Module):
         noise = torch.randn_like(uv) * self.sine_amp / 3
         return sine_merge, noise, uv
 
+    def forward_frames(self, x):
+        """
+        Sine_source, noise_source = SourceModuleHnNSF.forward_frames(F0)
+        Same as forward, with F0 at frame rate instead of nearest-upsampled
+        to the sample rate.
+        F0 (batchsize, frames, 1)
+        """
+        with torch.no_grad():
+            sine_wavs, uv, _ = self.l_sin_gen.forward_frames(x)
+        sine_merge = self.l_tanh(self.l_linear(sine_wavs))
+
+        noise = torch.randn_like(uv) * self.sine_amp / 3
+        return sine_merge, noise, uv
+
 
 def padDiff(x):
     return F.pad(
@@ -525,9 +589,11 @@ class Generator(torch.nn.Module):
 
     def forward(self, x, s, f0):
         with torch.no_grad():
-            f0 = self.f0_upsamp(f0[:, None]).transpose(1, 2)  # bs,n,t
-
-            har_source, noi_source, uv = self.m_source(f0)
+            # The source runs on frame-rate F0, which is equivalent to
+            # self.m_source(self.f0_upsamp(f0[:, None]).transpose(1, 2))
+            har_source, noi_source, uv = self.m_source.forward_frames(
+                f0[:, :, None]
+            )
             har_source = har_source.transpose(1, 2).squeeze(1)
             har_spec, har_phase = self.stft.transform(har_source)
             har = torch.cat([har_spec, har_phase], dim=1)
@@ -1,6 +1,11 @@
+from collections import OrderedDict
+import numpy as np
 import phonemizer
 import re
+import threading
 import torch
+import torch.nn as nn
+from .export import TorchScriptKokoro
 
 
 def split_num(num):
@@ -51,45 +56,103 @@ def point_num(num):
     return " point ".join([a, " ".join(b)])
 
 
+# Character mappings of normalize_text, applied in one str.translate pass:
+# curly quotes and guillemets to straight quotes, parentheses to
+# guillemets, CJK punctuation to ASCII punctuation followed by a space and
+# any whitespace other than space and newline to a space
+_NORMALIZE_TABLE = str.maketrans(
+    {
+        chr(8216): "'",
+        chr(8217): "'",
+        "«": '"',
+        "»": '"',
+        chr(8220): '"',
+        chr(8221): '"',
+        "(": "«",
+        ")": "»",
+        **{a: b + " " for a, b in zip("、。！，：；？", ",.!,:;?")},
+        **{
+            c: " "
+            for c in map(chr, range(0x10000))
+            if c.isspace() and c not in " \n"
+        },
+    }
+)
+_SPACES = re.compile(r"(?<=\n)( +)(?=\n)|  +")
+
+# Titles, "etc." and "yeah" in a single alternation, one group per word
+_WORDS = re.compile(
+    r"(?P<doctor>\bD[Rr]\.(?= [A-Z]))"
+    r"|(?P<mister>\b(?:Mr\.|MR\.(?= [A-Z])))"
+    r"|(?P<miss>\b(?:Ms\.|MS\.(?= [A-Z])))"
+    r"|(?P<mrs>\b(?:Mrs\.|MRS\.(?= [A-Z])))"
+    r"|(?P<etc>\betc\.(?! [A-Z]))"
+    r"|(?P<yeah>(?i:\b(y)eah?\b))"
+)
+
+_DIGIT = re.compile(r"\d")
+_SPLIT_NUM = re.compile(
+    r"\d*\.\d+|\b\d{4}s?\b|(?<!:)\b(?:[1-9]|1[0-2]):[0-5]\d\b(?!:)"
+)
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d)")
+_MONEY = re.compile(
+    r"(?i)[$£]\d+(?:\.\d+)?(?: hundred| thousand| (?:[bm]|tr)illion)*\b|"
+    r"[$£]\d+\.\d\d?\b"
+)
+_POINT_NUM = re.compile(r"\d*\.\d+")
+_RANGE = re.compile(r"(?<=\d)-(?=\d)")
+_PLURAL_NUM = re.compile(r"(?<=\d)S")
+_CONSONANT_S = re.compile(r"(?<=[BCDFGHJ-NP-TV-Z])'?s\b")
+_X_S = re.compile(r"(?<=X')S\b")
+_INITIALISM = re.compile(r"(?:[A-Za-z]\.){2,} [a-z]")
+_INITIALISM_DOT = re.compile(r"(?i)(?<=[A-Z])\.(?=[A-Z])")
+
+
+def _replace_words(text):
+    # A replacement ends with a letter instead of a dot, which removes the
+    # word boundary a directly following word needs. With separate passes
+    # that word was only replaced if its pass ran first. Groups are
+    # numbered in the order of those passes.
+    last = [-1, -1]
+
+    def replace(m):
+        name = m.lastgroup
+        if m.start() == last[0] and m.lastindex > last[1]:
+            return m.group()
+        last[:] = [m.end(), m.lastindex]
+        if name == "doctor":
+            return "Doctor"
+        elif name == "mister":
+            return "Mister"
+        elif name == "miss":
+            return "Miss"
+        elif name == "mrs":
+            return "Mrs"
+        elif name == "etc":
+            return "etc"
+        return f"{m.group(m.lastindex + 1)}e'a"
+
+    return _WORDS.sub(replace, text)
+
+
 def normalize_text(text):
-    text = text.replace(chr(8216), "'").replace(chr(8217), "'")
-    text = text.replace("«", chr(8220)).replace("»", chr(8221))
-    text = text.replace(chr(8220), '"').replace(chr(8221), '"')
-    text = text.replace("(", "«").replace(")", "»")
-    for a, b in zip("、。！，：；？", ",.!,:;?"):
-        text = text.replace(a, b + " ")
-    text = re.sub(r"[^\S \n]", " ", text)
-    text = re.sub(r"  +", " ", text)
-    text = re.sub(r"(?<=\n) +(?=\n)", "", text)
-    text = re.sub(r"\bD[Rr]\.(?= [A-Z])", "Doctor", text)
-    text = re.sub(r"\b(?:Mr\.|MR\.(?= [A-Z]))", "Mister", text)
-    text = re.sub(r"\b(?:Ms\.|MS\.(?= [A-Z]))", "Miss", text)
-    text = re.sub(r"\b(?:Mrs\.|MRS\.(?= [A-Z]))", "Mrs", text)
-    text = re.sub(r"\betc\.(?! [A-Z])", "etc", text)
-    text = re.sub(r"(?i)\b(y)eah?\b", r"\1e'a", text)
-    text = re.sub(
-        r"\d*\.\d+|\b\d{4}s?\b|(?<!:)\b(?:[1-9]|1[0-2]):[0-5]\d\b(?!:)",
-        split_num,
-        text,
-    )
-    text = re.sub(r"(?<=\d),(?=\d)", "", text)
-    text = re.sub(
-        r"(?i)[$£]\d+(?:\.\d+)?(?: hundred| thousand| (?:[bm]|tr)illion)*\b|"
-        r"[$£]\d+\.\d\d?\b",
-        flip_money,
-        text,
-    )
-    text = re.sub(r"\d*\.\d+", point_num, text)
-    text = re.sub(r"(?<=\d)-(?=\d)", " to ", text)
-    text = re.sub(r"(?<=\d)S", " S", text)
-    text = re.sub(r"(?<=[BCDFGHJ-NP-TV-Z])'?s\b", "'S", text)
-    text = re.sub(r"(?<=X')S\b", "s", text)
-    text = re.sub(
-        r"(?:[A-Za-z]\.){2,} [a-z]",
-        lambda m: m.group().replace(".", "-"),
-        text,
-    )
-    text = re.sub(r"(?i)(?<=[A-Z])\.(?=[A-Z])", "-", text)
+    text = text.translate(_NORMALIZE_TABLE)
+    if "  " in text or "\n" in text:
+        text = _SPACES.sub(lambda m: "" if m.group(1) else " ", text)
+    text = _replace_words(text)
+    if _DIGIT.search(text):
+        text = _SPLIT_NUM.sub(split_num, text)
+        text = _THOUSANDS.sub("", text)
+        text = _MONEY.sub(flip_money, text)
+        text = _POINT_NUM.sub(point_num, text)
+        text = _RANGE.sub(" to ", text)
+        text = _PLURAL_NUM.sub(" S", text)
+    text = _CONSONANT_S.sub("'S", text)
+    if "X'S" in text:
+        text = _X_S.sub("s", text)
+    if "." in text:
+        text = _INITIALISM.sub(lambda m: m.group().replace(".", "-"), text)
+        text = _INITIALISM_DOT.sub("-", text)
     return text.strip()
 
 
@@ -111,8 +174,45 @@ def get_vocab():
 VOCAB = get_vocab()
 
 
+class Tokenizer:
+    """
+    Converts phoneme strings to token ids and back with lookup arrays: a
+    dense codepoint-to-id array for encoding and an id-to-symbol array for
+    decoding, so whole strings are converted without per-character dict
+    lookups or Python lists.
+    """
+
+    def __init__(self, vocab):
+        # The last entry is shared by every codepoint above the vocabulary
+        self.ids = np.full(max(map(ord, vocab)) + 2, -1, dtype=np.int64)
+        self.symbols = np.full(max(vocab.values()) + 1, "", dtype="<U1")
+        for symbol, i in vocab.items():
+            self.ids[ord(symbol)] = i
+            self.symbols[i] = symbol
+
+    def encode(self, ps):
+        """
+        Returns the token ids of a phoneme string, skipping symbols that are
+        not in the vocabulary.
+        """
+        data = ps.encode("utf-32-le", "surrogatepass")
+        codepoints = np.frombuffer(data, dtype=np.uint32)
+        ids = self.ids[np.minimum(codepoints, len(self.ids) - 1)]
+        return ids[ids >= 0]
+
+    def decode(self, ids):
+        """
+        Returns the phoneme string of token ids produced by encode.
+        """
+        symbols = self.symbols[np.asarray(ids, dtype=np.int64)]
+        return symbols.tobytes().decode("utf-32-le")
+
+
+TOKENIZER = Tokenizer(VOCAB)
+
+
 def tokenize(ps):
-    return [i for i in map(VOCAB.get, ps) if i is not None]
+    return TOKENIZER.encode(ps)
 
 
 phonemizers = dict(
@@ -125,27 +225,62 @@ phonemizers = dict(
 )
 
 
-def phonemize(text, lang, norm=True):
-    if norm:
-        text = normalize_text(text)
-    ps = phonemizers[lang].phonemize([text])
-    ps = ps[0] if ps else ""
+_PHONEME_TABLE = str.maketrans({"ʲ": "j", "r": "ɹ", "x": "k", "ɬ": "l"})
+_HUNDRED = re.compile(r"(?<=[a-zɹː])(?=hˈʌndɹɪd)")
+_TRAILING_Z = re.compile(r' z(?=[;:,.!?¡¿—…"«»“” ]|$)')
+_NINETY = re.compile(r"(?<=nˈaɪn)ti(?!ː)")
+_NON_VOCAB = re.compile(f"[^{re.escape(''.join(VOCAB))}]+")
+
+
+def postprocess_phonemes(ps, lang):
     # https://en.wiktionary.org/wiki/kokoro#English
     ps = ps.replace("kəkˈoːɹoʊ", "kˈoʊkəɹoʊ").replace("kəkˈɔːɹəʊ", "kˈəʊkəɹəʊ")
-    ps = (
-        ps.replace("ʲ", "j")
-        .replace("r", "ɹ")
-        .replace("x", "k")
-        .replace("ɬ", "l")
-    )
-    ps = re.sub(r"(?<=[a-zɹː])(?=hˈʌndɹɪd)", " ", ps)
-    ps = re.sub(r' z(?=[;:,.!?¡¿—…"«»“” ]|$)', "z", ps)
+    ps = ps.translate(_PHONEME_TABLE)
+    ps = _HUNDRED.sub(" ", ps)
+    ps = _TRAILING_Z.sub("z", ps)
     if lang == "a":
-        ps = re.sub(r"(?<=nˈaɪn)ti(?!ː)", "di", ps)
-    ps = "".join(filter(lambda p: p in VOCAB, ps))
+        ps = _NINETY.sub("di", ps)
+    ps = _NON_VOCAB.sub("", ps)
     return ps.strip()
 
 
+# Phonemes keyed by (normalized text, lang), so sentences phonemized while
+# chunking are not sent to espeak again for synthesis
+PHONEME_CACHE_SIZE = 10000
+_phoneme_cache = OrderedDict()
+_phoneme_lock = threading.Lock()
+
+
+def phonemize_batch(texts, lang, norm=True):
+    if norm:
+        texts = [normalize_text(text) for text in texts]
+    with _phoneme_lock:
+        missing = list(
+            dict.fromkeys(t for t in texts if (t, lang) not in _phoneme_cache)
+        )
+        if missing:
+            # One espeak call for every text that is not cached yet
+            results = phonemizers[lang].phonemize(missing)
+            if len(results) != len(missing):
+                results = [
+                    (phonemizers[lang].phonemize([text]) or [""])[0]
+                    for text in missing
+                ]
+            for text, ps in zip(missing, results):
+                _phoneme_cache[(text, lang)] = postprocess_phonemes(ps, lang)
+        phonemes = []
+        for text in texts:
+            _phoneme_cache.move_to_end((text, lang))
+            phonemes.append(_phoneme_cache[(text, lang)])
+        while len(_phoneme_cache) > PHONEME_CACHE_SIZE:
+            _phoneme_cache.popitem(last=False)
+    return phonemes
+
+
+def phonemize(text, lang, norm=True):
+    return phonemize_batch([text], lang, norm)[0]
+
+
 def length_to_mask(lengths):
     mask = (
         torch.arange(lengths.max())
@@ -157,47 +292,86 @@ def length_to_mask(lengths):
     return mask
 
 
-@torch.no_grad()
-def forward(model, tokens, ref_s, speed):
+@torch.inference_mode()
+def forward_batch(model, tokens_list, ref_s, speed):
+    # Synthesizes several token sequences at once. The token-level networks
+    # (PLBERT, duration encoder and predictor, text encoder) run on a single
+    # padded batch and respect the per-item lengths. The frame-level F0/N
+    # predictor and the decoder normalize over the whole time axis
+    # (InstanceNorm in AdaIN1d), so they run per item on the unpadded
+    # frames to keep the output identical to unbatched synthesis.
+    if isinstance(model, TorchScriptKokoro):
+        return model.forward_batch(tokens_list, ref_s, speed)
     device = ref_s.device
-    tokens = torch.LongTensor([[0, *tokens, 0]]).to(device)
-    input_lengths = torch.LongTensor([tokens.shape[-1]]).to(device)
+    input_lengths = torch.LongTensor([len(t) + 2 for t in tokens_list])
+    tokens = torch.zeros(len(tokens_list), input_lengths.max().item()).long()
+    for i, item in enumerate(tokens_list):
+        tokens[i, 1: len(item) + 1] = torch.as_tensor(item)
+    tokens = tokens.to(device)
+    input_lengths = input_lengths.to(device)
     text_mask = length_to_mask(input_lengths).to(device)
     bert_dur = model.bert(tokens, attention_mask=(~text_mask).int())
     d_en = model.bert_encoder(bert_dur).transpose(-1, -2)
     s = ref_s[:, 128:]
     d = model.predictor.text_encoder(d_en, s, input_lengths, text_mask)
-    x, _ = model.predictor.lstm(d)
+    x = nn.utils.rnn.pack_padded_sequence(
+        d, input_lengths.cpu(), batch_first=True, enforce_sorted=False
+    )
+    x, _ = model.predictor.lstm(x)
+    x, _ = nn.utils.rnn.pad_packed_sequence(x, batch_first=True)
     duration = model.predictor.duration_proj(x)
     duration = torch.sigmoid(duration).sum(axis=-1) / speed
     pred_dur = torch.round(duration).clamp(min=1).long()
-    pred_aln_trg = torch.zeros(input_lengths, pred_dur.sum().item())
-    c_frame = 0
-
-    for i in range(pred_aln_trg.size(0)):
-        pred_aln_trg[i, c_frame: c_frame + pred_dur[0, i].item()] = 1
-        c_frame += pred_dur[0, i].item()
-    en = d.transpose(-1, -2) @ pred_aln_trg.unsqueeze(0).to(device)
-    F0_pred, N_pred = model.predictor.F0Ntrain(en, s)
     t_en = model.text_encoder(tokens, input_lengths, text_mask)
-    asr = t_en @ pred_aln_trg.unsqueeze(0).to(device)
-    return (
-        model.decoder(asr, F0_pred, N_pred, ref_s[:, :128])
-        .squeeze()
-        .cpu()
-        .numpy()
-    )
+
+    outputs = []
+    for i, length in enumerate(input_lengths.tolist()):
+        # Repeating every token's features by its duration is the same as
+        # multiplying by the one-hot [tokens x frames] alignment matrix
+        dur = pred_dur[i, :length]
+        en = d[i, :length].repeat_interleave(dur, dim=0).T.unsqueeze(0)
+        F0_pred, N_pred = model.predictor.F0Ntrain(en, s[i: i + 1])
+        asr = t_en[i: i + 1, :, :length].repeat_interleave(dur, dim=-1)
+        out = model.decoder(asr, F0_pred, N_pred, ref_s[i: i + 1, :128])
+        outputs.append(out.squeeze().cpu().numpy())
+    return outputs
+
+
+def forward(model, tokens, ref_s, speed):
+    return forward_batch(model, [tokens], ref_s, speed)[0]
 
 
 def generate(model, text, voicepack, lang="a", speed=1, ps=None):
     ps = ps or phonemize(text, lang)
     tokens = tokenize(ps)
-    if not tokens:
+    if len(tokens) == 0:
         return None
     elif len(tokens) > 510:
         tokens = tokens[:510]
         print("Truncated to 510 tokens")
     ref_s = voicepack[len(tokens)]
     out = forward(model, tokens, ref_s, speed)
-    ps = "".join(next(k for k, v in VOCAB.items() if i == v) for i in tokens)
-    return out, ps
+    return out, TOKENIZER.decode(tokens)
+
+
+def generate_batch(model, texts, voicepack, lang="a", speed=1, ps_list=None):
+    # Batched counterpart of generate, returns one (audio, ps) per text
+    ps_list = ps_list or [phonemize(text, lang) for text in texts]
+    results = [None] * len(ps_list)
+    tokens_list, indices = [], []
+    for idx, ps in enumerate(ps_list):
+        tokens = tokenize(ps)
+        if len(tokens) == 0:
+            continue
+        elif len(tokens) > 510:
+            tokens = tokens[:510]
+            print("Truncated to 510 tokens")
+        tokens_list.append(tokens)
+        indices.append(idx)
+    if not tokens_list:
+        return results
+    ref_s = torch.cat([voicepack[len(tokens)] for tokens in tokens_list])
+    outs = forward_batch(model, tokens_list, ref_s, speed)
+    for idx, tokens, out in zip(indices, tokens_list, outs):
+        results[idx] = (out, TOKENIZER.decode(tokens))
+    return results
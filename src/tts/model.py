@@ -2,8 +2,9 @@ from .istftnet import AdaIN1d, Decoder
 from munch import Munch
 from pathlib import Path
 from .plbert import load_plbert
-from torch.nn.utils import weight_norm
+from torch.nn.utils import weight_norm, remove_weight_norm
 import json
+import os
 import numpy as np
 import torch
 import torch.nn as nn
@@ -372,7 +373,9 @@ class DurationEncoder(nn.Module):
                 x = nn.utils.rnn.pack_padded_sequence(
                     x, input_lengths, batch_first=True, enforce_sorted=False
                 )
-                block.flatten_parameters()
+                # Dynamically quantized LSTMs have no cuDNN weights to flatten
+                if isinstance(block, nn.RNNBase):
+                    block.flatten_parameters()
                 x, _ = block(x)
                 x, _ = nn.utils.rnn.pad_packed_sequence(x, batch_first=True)
                 x = F.dropout(x, p=self.dropout, training=self.training)
@@ -414,7 +417,55 @@ def recursive_munch(d):
         return d
 
 
-def build_model(path, device):
+def strip_for_inference(model):
+    # Folds weight norm into plain weights, so it is not recomputed from g
+    # and v on every call, and drops the dropouts, which are no-ops in eval
+    for part in model.values():
+        for module in part.modules():
+            if hasattr(module, "weight_g"):
+                remove_weight_norm(module)
+            for name, child in module.named_children():
+                if isinstance(child, nn.Dropout):
+                    setattr(module, name, nn.Identity())
+    return model
+
+
+def quantize_dynamic_int8(model):
+    # Dynamic int8 quantization for CPU inference: weights of the PLBERT,
+    # bert_encoder and prosody predictor Linear/LSTM layers are stored as
+    # int8 and activations are quantized on the fly
+    model.bert = torch.ao.quantization.quantize_dynamic(
+        model.bert, {nn.Linear}, dtype=torch.qint8
+    )
+    model.bert_encoder = torch.ao.quantization.quantize_dynamic(
+        nn.Sequential(model.bert_encoder), {nn.Linear}, dtype=torch.qint8
+    )[0]
+    model.predictor = torch.ao.quantization.quantize_dynamic(
+        model.predictor, {nn.Linear, nn.LSTM}, dtype=torch.qint8
+    )
+    return model
+
+
+def inference_checkpoint_path(path):
+    return f"{os.path.splitext(path)[0]}.inference.pth"
+
+
+def _checkpoint_source(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def _load_inference_checkpoint(path):
+    cache_path = inference_checkpoint_path(path)
+    if not os.path.exists(cache_path):
+        return None
+    checkpoint = torch.load(cache_path, map_location="cpu", weights_only=True)
+    if checkpoint.get("source") != _checkpoint_source(path):
+        return None
+    return checkpoint["net"]
+
+
+def build_model(path, device, fuse=False):
     config = Path(__file__).parent / "config.json"
     assert (
         config.exists()
@@ -462,6 +513,21 @@ def build_model(path, device):
         decoder=decoder.to(device).eval(),
         text_encoder=text_encoder.to(device).eval(),
     )
+
+    # Without a checkpoint the weights stay randomly initialized, which is
+    # enough for benchmarks
+    if path is None:
+        return strip_for_inference(model) if fuse else model
+
+    # With fuse, the weights of an already stripped model are loaded from
+    # the inference checkpoint written next to the original one
+    fused = _load_inference_checkpoint(path) if fuse else None
+    if fused is not None:
+        strip_for_inference(model)
+        for key, state_dict in fused.items():
+            model[key].load_state_dict(state_dict)
+        return model
+
     for key, state_dict in torch.load(
         path, map_location="cpu", weights_only=True
     )["net"].items():
@@ -471,4 +537,17 @@ def build_model(path, device):
         except Exception:
             state_dict = {k[7:]: v for k, v in state_dict.items()}
             model[key].load_state_dict(state_dict, strict=False)
+
+    if fuse:
+        strip_for_inference(model)
+        try:
+            torch.save(
+                {
+                    "net": {k: part.state_dict() for k, part in model.items()},
+                    "source": _checkpoint_source(path),
+                },
+                inference_checkpoint_path(path),
+            )
+        except OSError as e:
+            print(f"Could not save the inference checkpoint: {e}")
     return model
@@ -0,0 +1,119 @@
+import time
+import logging
+import numpy as np
+import torch
+from .kokoro import VOCAB, forward
+
+logger = logging.getLogger()
+
+WARMUP_LENGTHS = [16, 64]
+
+
+class ServingProfile:
+    """
+    Process-wide runtime settings for serving the TTS model, and a warm-up
+    pass that takes the lazy initialization of the first calls (oneDNN
+    primitives, LSTM workspaces, allocator growth) out of the first real
+    request.
+    """
+
+    def __init__(
+        self,
+        num_threads=None,
+        num_interop_threads=None,
+        flush_denormal=True,
+        warmup_lengths=WARMUP_LENGTHS,
+        steady_runs=2,
+    ):
+        """
+        Args:
+            num_threads (int): Intra-op threads, torch's default if None.
+            num_interop_threads (int): Inter-op threads, torch's default if
+                                       None.
+            flush_denormal (bool): Flush denormal floats to zero on CPU,
+                                   which avoids slow paths in the decoder.
+            warmup_lengths (list): Token counts synthesized once each at
+                                   load time.
+            steady_runs (int): Calls timed after the first one to measure
+                               the steady-state latency, at least one.
+        """
+        self.num_threads = num_threads
+        self.num_interop_threads = num_interop_threads
+        self.flush_denormal = flush_denormal
+        self.warmup_lengths = list(warmup_lengths)
+        self.steady_runs = max(1, steady_runs)
+
+    @classmethod
+    def from_config(cls, settings):
+        """
+        Creates a profile from the tts_serving section of config.yaml.
+
+        Args:
+            settings (dict): The section, or None for the defaults.
+
+        Returns:
+            ServingProfile: The profile.
+        """
+        settings = settings or {}
+        return cls(
+            num_threads=settings.get("threads"),
+            num_interop_threads=settings.get("interop_threads"),
+            flush_denormal=settings.get("flush_denormal", True),
+            warmup_lengths=settings.get("warmup_lengths", WARMUP_LENGTHS),
+            steady_runs=settings.get("steady_runs", 2),
+        )
+
+    def apply(self):
+        """
+        Applies the thread and denormal settings to the process.
+        """
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        if self.num_interop_threads:
+            try:
+                torch.set_num_interop_threads(self.num_interop_threads)
+            except RuntimeError as e:
+                # Only possible before the first inter-op parallel work
+                logger.warning(f"Could not set inter-op threads: {e}")
+        if self.flush_denormal and not torch.set_flush_denormal(True):
+            logger.warning("Denormal flushing is not supported on this CPU")
+        logger.info(
+            f"TTS threads: {torch.get_num_threads()} intra-op, "
+            f"{torch.get_num_interop_threads()} inter-op"
+        )
+
+    def warm_up(self, model, voicepack):
+        """
+        Synthesizes random token sequences of every warm-up length and
+        measures the latency of the first call against later calls.
+
+        Args:
+            model (Munch or TorchScriptKokoro): The loaded model.
+            voicepack (MappedVoicepack or torch.Tensor): Voice to use.
+
+        Returns:
+            dict: First-call and steady-state latency in seconds, keyed by
+                  token count.
+        """
+        generator = np.random.default_rng(0)
+        # Any symbol but the pad token
+        ids = np.array(sorted(set(VOCAB.values()) - {0}))
+        report = {}
+        for length in self.warmup_lengths:
+            tokens = generator.choice(ids, size=length)
+            ref_s = voicepack[length]
+            times = []
+            for _ in range(1 + self.steady_runs):
+                start = time.perf_counter()
+                forward(model, tokens, ref_s, 1)
+                times.append(time.perf_counter() - start)
+            report[length] = {
+                "first_s": times[0],
+                "steady_s": float(np.median(times[1:])),
+            }
+            logger.info(
+                f"TTS warm-up with {length} tokens: first call "
+                f"{times[0]:.2f}s, steady state "
+                f"{report[length]['steady_s']:.2f}s"
+            )
+        return report
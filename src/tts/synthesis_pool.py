@@ -0,0 +1,130 @@
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import torch
+from .kokoro import generate_batch
+
+logger = logging.getLogger()
+
+# Model and voice pack of a worker process, set by _init_worker
+_worker_model = None
+_worker_voicepack = None
+
+
+def threads_per_worker(workers):
+    """
+    Returns the number of torch intra-op threads each worker may use so that
+    the pool does not run more threads than there are cores.
+
+    Args:
+        workers (int): Number of worker processes.
+
+    Returns:
+        int: Threads per worker, at least one.
+    """
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def _pool_context():
+    # Forked workers inherit the loaded model copy-on-write. Platforms
+    # without fork get the weights through torch shared memory instead.
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+
+def _share_model(model):
+    for module in model.values():
+        module.share_memory()
+
+
+def _init_worker(model, voicepack, num_threads):
+    global _worker_model, _worker_voicepack
+    torch.set_num_threads(num_threads)
+    _worker_model = model
+    _worker_voicepack = voicepack
+
+
+def _synthesize(batch, lang, speed, voicepack=None):
+    results = generate_batch(
+        _worker_model,
+        [chunk.text for chunk in batch],
+        _worker_voicepack if voicepack is None else voicepack,
+        lang=lang,
+        speed=speed,
+        ps_list=[chunk.phonemes for chunk in batch],
+    )
+    return [result[0] if result else None for result in results]
+
+
+class SynthesisPool:
+    """
+    Pool of worker processes synthesizing text chunks in parallel with one
+    loaded Kokoro model.
+
+    Workers are forked after the model is loaded, so they share its weights
+    with the parent process instead of loading their own copy. Each worker
+    gets an equal share of the cores for torch intra-op threading.
+
+    All workers are started when the pool is created. Forking is only safe
+    while the process runs no other threads, so a pool is created once,
+    right after the model is loaded, and reused for every text.
+    """
+
+    def __init__(self, model, voicepack, workers):
+        """
+        Args:
+            model (Munch): Eager Kokoro model on CPU.
+            voicepack (torch.Tensor): Voice pack used for every chunk.
+            workers (int): Number of worker processes.
+        """
+        context = _pool_context()
+        if context.get_start_method() != "fork":
+            _share_model(model)
+            voicepack.share_memory_()
+        num_threads = threads_per_worker(workers)
+        logger.info(
+            f"Starting {workers} TTS workers with {num_threads} threads each"
+        )
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(model, voicepack, num_threads),
+        )
+        # The first task forks every worker at once
+        self.executor.submit(threads_per_worker, workers).result()
+
+    def map(self, batches, lang="a", speed=1, voicepack=None):
+        """
+        Synthesizes batches of chunks across the workers.
+
+        Args:
+            batches (list): Lists of Chunk objects.
+            lang (str): Language code for phonemization.
+            speed (float): Speaking speed.
+            voicepack (torch.Tensor): Voice pack sent with every batch,
+                                      the pool's one if None.
+
+        Yields:
+            list: 1D float audio of every chunk of a batch (None for chunks
+                  without tokens), batch by batch in the order they were
+                  given.
+        """
+        return self.executor.map(
+            _synthesize,
+            batches,
+            [lang] * len(batches),
+            [speed] * len(batches),
+            [voicepack] * len(batches),
+        )
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
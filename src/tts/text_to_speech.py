@@ -1,12 +1,26 @@
+import os
 import yaml
 import re
+import threading
+import wave
 import numpy as np
 import torch
 import logging.config
 from dotenv import load_dotenv, find_dotenv
 from scipy.io.wavfile import write
-from .model import build_model
-from .kokoro import tokenize, phonemize, generate
+from .audio_cache import AudioCache
+from .model import build_model, quantize_dynamic_int8
+from .export import TorchScriptKokoro, default_export_dir
+from .serving import ServingProfile
+from .kokoro import (
+    tokenize,
+    normalize_text,
+    phonemize,
+    phonemize_batch,
+    generate_batch,
+)
+from .synthesis_pool import SynthesisPool
+from .voices import VoiceRegistry
 
 load_dotenv(find_dotenv())
 
@@ -23,8 +37,102 @@ logger = logging.getLogger()
 DEFAULT_MODEL_PATH = config.get("default_tts_model_path")
 DEFAULT_VOICES_DIR = config.get("default_voices_path")
 DEFAULT_VOICE_INDEX = 2
-MAX_TOKENS = 500
+DEFAULT_BACKEND = config.get("tts_backend", "eager")
+FUSE_WEIGHTS = config.get("tts_fuse_weights", True)
+QUANTIZE = config.get("tts_quantize", False)
+WORKERS = config.get("tts_workers", 1)
+AUDIO_CACHE_DIR = config.get("tts_audio_cache_dir")
+AUDIO_CACHE_MAX_MB = config.get("tts_audio_cache_max_mb", 1024)
+SERVING_PROFILE = ServingProfile.from_config(config.get("tts_serving"))
+# Token window of the model, generate truncates longer inputs
+MAX_TOKENS = 510
 SAMPLE_RATE = 24000
+BATCH_SIZE = 4
+# Voices selectable by index, in the order of the original voice list
+VOICE_NAMES = [
+    "af",
+    "af_bella",
+    "af_sarah",
+    "am_adam",
+    "am_michael",
+    "bf_emma",
+    "bf_isabella",
+    "bm_george",
+    "bm_lewis",
+    "af_nicole",
+    "af_sky",
+]
+
+# Process-wide registries, so that every KokoroVoiceModel shares the
+# checkpoints and voices that were already loaded
+_models = {}
+_voice_registries = {}
+_voice_models = {}
+_warmup_reports = {}
+_registry_lock = threading.RLock()
+_audio_cache = (
+    AudioCache(AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_MB * 2**20)
+    if AUDIO_CACHE_DIR
+    else None
+)
+
+
+def load_model(model_path, device, backend=DEFAULT_BACKEND, quantize=False):
+    """
+    Builds the Kokoro model from a checkpoint, or returns the instance that
+    was already loaded for the same checkpoint, device and backend.
+
+    Args:
+        model_path (str): Path to the model file.
+        device (str): Device to load the model on.
+        backend (str): "eager" to build the PyTorch modules, "torchscript"
+                       to run the graphs exported next to the model file
+                       with `python -m tts.export`. Eager models are
+                       loaded with weight norm folded into the weights
+                       unless tts_fuse_weights is disabled.
+        quantize (bool): Apply dynamic int8 quantization to the eager
+                         model. Only supported on CPU.
+
+    Returns:
+        Munch or TorchScriptKokoro: The loaded model.
+    """
+    if quantize and (backend != "eager" or device != "cpu"):
+        logger.warning("int8 quantization needs the eager CPU backend")
+        quantize = False
+    key = (os.path.abspath(model_path), device, backend, quantize)
+    with _registry_lock:
+        if key not in _models:
+            logger.info(f"Loading Kokoro model from {model_path}...")
+            if backend == "eager":
+                model = build_model(model_path, device, fuse=FUSE_WEIGHTS)
+                if quantize:
+                    model = quantize_dynamic_int8(model)
+                _models[key] = model
+            elif backend == "torchscript":
+                _models[key] = TorchScriptKokoro(
+                    default_export_dir(model_path), device
+                )
+            else:
+                raise ValueError(f"Unknown TTS backend: {backend}")
+        return _models[key]
+
+
+def get_voice_registry(voices_dir, device):
+    """
+    Returns the shared VoiceRegistry of a voices folder and device.
+
+    Args:
+        voices_dir (str): Directory where voice packs are stored.
+        device (str): Device to load the voice packs on.
+
+    Returns:
+        VoiceRegistry: The shared registry.
+    """
+    key = (os.path.abspath(voices_dir), device)
+    with _registry_lock:
+        if key not in _voice_registries:
+            _voice_registries[key] = VoiceRegistry(voices_dir, device)
+        return _voice_registries[key]
 
 
 class KokoroVoiceModel:
@@ -37,6 +145,11 @@ class KokoroVoiceModel:
         model_path=DEFAULT_MODEL_PATH,
         voice_index=DEFAULT_VOICE_INDEX,
         voices_dir=DEFAULT_VOICES_DIR,
+        backend=DEFAULT_BACKEND,
+        quantize=QUANTIZE,
+        voice=None,
+        profile=SERVING_PROFILE,
+        workers=WORKERS,
     ):
         """
         Initializes the Kokoro model and loads the specified voice pack.
@@ -45,12 +158,35 @@ class KokoroVoiceModel:
             model_path (str): Path to the model file.
             voice_index (int): Index of the voice to use from the VOICE_NAME
             voices_dir (str): Directory where voice packs are stored.
+            backend (str): "eager" or "torchscript", see load_model.
+            quantize (bool): Use the dynamic int8 model on CPU.
+            voice (str): Name of the default voice, overrides voice_index.
+                         Any voice found in voices_dir can be used.
+            profile (ServingProfile): Thread settings and warm-up applied
+                                      when the model is loaded, None to
+                                      leave the process as it is.
+            workers (int): Number of synthesis processes started with the
+                           model, see SynthesisPool. Create the model
+                           before starting other threads when it is more
+                           than one.
         """
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.backend = backend
+        self.quantize = quantize
         self.model = self._load_model(model_path)
+        # Identifies the weights, backend and model settings in cache keys
+        quantized = quantize and backend == "eager" and self.device == "cpu"
+        fused = FUSE_WEIGHTS and backend == "eager"
+        self.model_version = (
+            f"{os.path.basename(model_path)}:{os.path.getsize(model_path)}:"
+            f"{backend}:{quantized}:{fused}"
+        )
+        self.voices = get_voice_registry(voices_dir, self.device)
         self.voicepack, self.voice_name = self._load_voicepack(
-            voice_index, voices_dir
+            voice_index, voice
         )
+        self.pool = self._start_pool(workers)
+        self.warmup_report = self._warm_up(profile) if profile else None
 
     def _load_model(self, model_path):
         """
@@ -62,43 +198,133 @@ class KokoroVoiceModel:
         Returns:
             torch.nn.Module: The loaded model.
         """
-        return build_model(model_path, self.device)
+        return load_model(
+            model_path, self.device, self.backend, self.quantize
+        )
 
-    def _load_voicepack(self, voice_index, voices_dir):
+    def _start_pool(self, workers):
+        """
+        Forks the synthesis processes, before the warm-up starts the torch
+        threads.
+
+        Args:
+            workers (int): Number of processes.
+
+        Returns:
+            SynthesisPool: The pool, or None for a single process.
+        """
+        if workers <= 1:
+            return None
+        if self.device != "cpu" or self.backend != "eager":
+            logger.warning("TTS workers need the eager CPU backend")
+            return None
+        return SynthesisPool(self.model, self.voicepack, workers)
+
+    def _load_voicepack(self, voice_index, voice=None):
         """
         Loads the voice pack and returns the voice tensor with voice name
 
         Args:
             voice_index (int): Index of the voice to use.
-            voices_dir (str): Directory where voice packs are stored.
+            voice (str): Name of the voice, used instead of the index.
 
         Returns:
             tuple: (voicepack, voice_name)
         """
-        voice_names = [
-            "af",
-            "af_bella",
-            "af_sarah",
-            "am_adam",
-            "am_michael",
-            "bf_emma",
-            "bf_isabella",
-            "bm_george",
-            "bm_lewis",
-            "af_nicole",
-            "af_sky",
-        ]
-        if not (0 <= voice_index < len(voice_names)):
-            raise ValueError(f"Invalid voice index: {voice_index}")
-
-        voice_name = voice_names[voice_index]
-        voicepack_path = f"{voices_dir}/{voice_name}.pt"
-        print(f"Loading voice pack from {voicepack_path}...")
-        voicepack = torch.load(voicepack_path, weights_only=True).to(
-            self.device
-        )
+        if voice is None:
+            if not (0 <= voice_index < len(VOICE_NAMES)):
+                raise ValueError(f"Invalid voice index: {voice_index}")
+            voice = VOICE_NAMES[voice_index]
+
+        return self._get_voice(voice), voice
+
+    def _get_voice(self, voice):
+        """
+        Returns the voice pack of a voice found in the voices folder.
+
+        Args:
+            voice (str): Name of the voice.
+
+        Returns:
+            MappedVoicepack or torch.Tensor: The voice pack.
+
+        Raises:
+            ValueError: If there is no such voice.
+        """
+        names = self.voices.names()
+        if voice not in names:
+            raise ValueError(
+                f"Unknown voice {voice!r}, available: {', '.join(names)}"
+            )
+        return self.voices.get(voice)
+
+    def _warm_up(self, profile):
+        """
+        Applies the serving profile and warms the model up, once per loaded
+        model.
+
+        Args:
+            profile (ServingProfile): The profile to apply.
+
+        Returns:
+            dict: First-call and steady-state latency per token count.
+        """
+        with _registry_lock:
+            key = id(self.model)
+            if key not in _warmup_reports:
+                profile.apply()
+                _warmup_reports[key] = profile.warm_up(
+                    self.model, self.voicepack
+                )
+            return _warmup_reports[key]
+
+    def get_voicepack(self, voice=None):
+        """
+        Returns the voice pack of a voice. Voices stay open in the registry,
+        so switching between them does not reload anything.
 
-        return voicepack, voice_name
+        Args:
+            voice (str): Name of the voice, the default voice if not given.
+
+        Returns:
+            MappedVoicepack or torch.Tensor: The voice pack.
+        """
+        if voice is None or voice == self.voice_name:
+            return self.voicepack
+        return self._get_voice(voice)
+
+
+def get_voice_model(
+    model_path=DEFAULT_MODEL_PATH,
+    voice_index=DEFAULT_VOICE_INDEX,
+    voices_dir=DEFAULT_VOICES_DIR,
+    **options,
+):
+    """
+    Returns the shared KokoroVoiceModel for the given settings, creating it
+    on first use.
+
+    Args:
+        model_path (str): Path to the model file.
+        voice_index (int): Index of the voice to use from the VOICE_NAME
+        voices_dir (str): Directory where voice packs are stored.
+        **options: Other KokoroVoiceModel arguments, such as `backend`.
+
+    Returns:
+        KokoroVoiceModel: The shared model instance.
+    """
+    key = (
+        os.path.abspath(model_path),
+        voice_index,
+        os.path.abspath(voices_dir),
+        tuple(sorted(options.items())),
+    )
+    with _registry_lock:
+        if key not in _voice_models:
+            _voice_models[key] = KokoroVoiceModel(
+                model_path, voice_index, voices_dir, **options
+            )
+        return _voice_models[key]
 
 
 def split_text_by_sentences(text):
@@ -123,12 +349,188 @@ def tokenize_sentence(sentence, lang="a"):
         lang (str): Language code for phonemization (default "a").
 
     Returns:
-        list: A list of tokens.
+        numpy array: The token ids.
     """
     phonemized_sentence = phonemize(sentence, lang)
     return tokenize(phonemized_sentence)
 
 
+def split_overlong(text):
+    """
+    Splits a piece of text that does not fit in the token window, at clause
+    boundaries if it has any and otherwise into two halves at a word
+    boundary.
+
+    Args:
+        text (str): The text to split.
+
+    Returns:
+        list: The parts of the text, a single part if it cannot be split.
+    """
+    clauses = [c for c in re.split(r"(?<=[,;:—–])\s+", text) if c]
+    if len(clauses) > 1:
+        return clauses
+    words = text.split()
+    if len(words) < 2:
+        return [text]
+    middle = len(words) // 2
+    return [" ".join(words[:middle]), " ".join(words[middle:])]
+
+
+class Chunk:
+    """
+    A piece of text synthesized in one forward pass, with its phonemes.
+    """
+
+    def __init__(self, text, phonemes, num_tokens, standalone=False):
+        """
+        Args:
+            text (str): Normalized text of the chunk.
+            phonemes (str): Phonemes of the chunk.
+            num_tokens (int): Number of tokens of the phonemes.
+            standalone (bool): Whether the chunk is a single piece kept out
+                               of packing, so that its audio can be reused.
+        """
+        self.text = text
+        self.phonemes = phonemes
+        self.num_tokens = num_tokens
+        self.standalone = standalone
+
+    def __repr__(self):
+        return f"Chunk(text={self.text[:30]!r}, num_tokens={self.num_tokens})"
+
+
+class ChunkPlan:
+    """
+    The chunks a text is synthesized in, in order.
+
+    Sentences are packed greedily into chunks of at most `max_tokens`
+    tokens, counting the space that joins them. With the order fixed,
+    greedy packing gives the fewest chunks, and thus forward passes.
+    Sentences that are longer than the window on their own are split at
+    clause boundaries first, and at word boundaries if needed. Pieces
+    selected as standalone, such as recurring boilerplate, get a chunk of
+    their own.
+    """
+
+    def __init__(self, chunks, max_tokens=MAX_TOKENS):
+        """
+        Args:
+            chunks (list): The planned chunks.
+            max_tokens (int): Token window the chunks were packed into.
+        """
+        self.chunks = chunks
+        self.max_tokens = max_tokens
+
+    @classmethod
+    def from_text(
+        cls, text, lang="a", max_tokens=MAX_TOKENS, standalone=None
+    ):
+        """
+        Plans the chunks of a text. The text is normalized as a whole, then
+        all sentences are phonemized in a single espeak call and the
+        phonemes are reused for synthesis.
+
+        Args:
+            text (str): The text to plan.
+            lang (str): Language code for phonemization (default "a").
+            max_tokens (int): Maximum number of tokens per chunk.
+            standalone (callable): Called with every piece (a Chunk of one
+                                   sentence or clause), returns whether the
+                                   piece gets a chunk of its own.
+
+        Returns:
+            ChunkPlan: The plan.
+        """
+        # Normalizing before the split expands abbreviations and
+        # initialisms ("Dr. Smith", "U.S."), which would otherwise end a
+        # sentence and be normalized without their context
+        sentences = [
+            s for s in split_text_by_sentences(normalize_text(text)) if s
+        ]
+        pieces = cls._fit(
+            sentences,
+            phonemize_batch(sentences, lang, norm=False),
+            lang,
+            max_tokens,
+        )
+        if standalone is not None:
+            for piece in pieces:
+                piece.standalone = bool(standalone(piece))
+        return cls(cls._pack(pieces, max_tokens), max_tokens)
+
+    @classmethod
+    def _fit(cls, texts, phonemes, lang, max_tokens):
+        # Splits every piece that is longer than the window on its own
+        pieces = []
+        for text, ps in zip(texts, phonemes):
+            num_tokens = len(tokenize(ps))
+            parts = split_overlong(text) if num_tokens > max_tokens else []
+            if len(parts) > 1:
+                pieces.extend(
+                    cls._fit(
+                        parts,
+                        phonemize_batch(parts, lang, norm=False),
+                        lang,
+                        max_tokens,
+                    )
+                )
+                continue
+            if num_tokens > max_tokens:
+                logger.warning(
+                    f"Cannot split text of {num_tokens} tokens: {text[:50]}"
+                )
+            pieces.append(Chunk(text, ps, num_tokens))
+        return pieces
+
+    @staticmethod
+    def _pack(pieces, max_tokens):
+        chunks = []
+        current = []
+        current_tokens = 0
+
+        def flush():
+            if current:
+                chunks.append(
+                    Chunk(
+                        " ".join(piece.text for piece in current),
+                        " ".join(piece.phonemes for piece in current),
+                        current_tokens,
+                    )
+                )
+
+        for piece in pieces:
+            if piece.standalone:
+                flush()
+                chunks.append(piece)
+                current = []
+                current_tokens = 0
+                continue
+            # Joined pieces are separated by a space token
+            needed = piece.num_tokens + (1 if current else 0)
+            if current and current_tokens + needed > max_tokens:
+                flush()
+                current = [piece]
+                current_tokens = piece.num_tokens
+            else:
+                current.append(piece)
+                current_tokens += needed
+
+        flush()
+
+        return chunks
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def __len__(self):
+        return len(self.chunks)
+
+    @property
+    def num_tokens(self):
+        return sum(chunk.num_tokens for chunk in self.chunks)
+
+
 def process_text_chunks(text, lang="a", max_tokens=MAX_TOKENS):
     """
     Splits text into manageable chunks of tokens if they exceed max_tokens.
@@ -141,27 +543,9 @@ def process_text_chunks(text, lang="a", max_tokens=MAX_TOKENS):
     Returns:
         list: A list of text chunks.
     """
-    sentences = split_text_by_sentences(text)
-    chunks = []
-    current_chunk = []
-    current_token_count = 0
-
-    for sentence in sentences:
-        tokens = tokenize_sentence(sentence, lang)
-        token_count = len(tokens)
-
-        if current_token_count + token_count > max_tokens:
-            chunks.append(" ".join(current_chunk))
-            current_chunk = [sentence]
-            current_token_count = token_count
-        else:
-            current_chunk.append(sentence)
-            current_token_count += token_count
-
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
-
-    return chunks
+    return [
+        chunk.text for chunk in ChunkPlan.from_text(text, lang, max_tokens)
+    ]
 
 
 def save_audio_output(audio_data, filename, sample_rate=SAMPLE_RATE):
@@ -191,49 +575,280 @@ def normalize_audio(audio_data):
     return (audio_data / np.max(np.abs(audio_data)) * 32767).astype(np.int16)
 
 
+class WavStreamWriter:
+    """
+    Writes audio to a .wav file chunk by chunk, normalized like
+    normalize_audio without holding the whole signal in memory.
+
+    Chunks are spooled as float32 to a temporary file while the running peak
+    is tracked. Closing the writer converts the spool to int16 in blocks.
+    """
+
+    BLOCK_SIZE = SAMPLE_RATE * 10
+
+    def __init__(self, filename, sample_rate=SAMPLE_RATE):
+        """
+        Args:
+            filename (str): The output .wav file name.
+            sample_rate (int): The audio sample rate.
+        """
+        self.filename = filename
+        self.sample_rate = sample_rate
+        self.spool_file = f"{filename}.part"
+        self._spool = open(self.spool_file, "wb")
+        self.peak = 0.0
+        self.num_samples = 0
+
+    def write(self, audio_data):
+        """
+        Appends a chunk of audio.
+
+        Args:
+            audio_data (numpy array): 1D float audio chunk.
+        """
+        audio_data = np.asarray(audio_data, dtype=np.float32)
+        if audio_data.size:
+            self.peak = max(self.peak, float(np.max(np.abs(audio_data))))
+        self._spool.write(audio_data.tobytes())
+        self.num_samples += audio_data.size
+
+    def close(self):
+        """
+        Normalizes the spooled audio into the final .wav file.
+        """
+        self._spool.close()
+        try:
+            spool = np.memmap(self.spool_file, dtype=np.float32, mode="r")
+            with wave.open(self.filename, "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(self.sample_rate)
+                for start in range(0, self.num_samples, self.BLOCK_SIZE):
+                    block = spool[start: start + self.BLOCK_SIZE]
+                    block = (block / self.peak * 32767).astype(np.int16)
+                    wav.writeframes(block.tobytes())
+            del spool
+        finally:
+            os.remove(self.spool_file)
+        print(f"Audio saved as {self.filename}")
+
+    def abort(self):
+        """
+        Discards the spooled audio without writing the .wav file.
+        """
+        self._spool.close()
+        if os.path.exists(self.spool_file):
+            os.remove(self.spool_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def synthesize_chunks(
+    kokoro, chunks, voicepack, lang="a", speed=1, batch_size=1, workers=1
+):
+    """
+    Synthesizes phonemized chunks in batches, in-process or across the
+    worker processes of the model.
+
+    Args:
+        kokoro (KokoroVoiceModel): Model to use.
+        chunks (list): Chunk objects of a ChunkPlan.
+        voicepack (MappedVoicepack or torch.Tensor): Voice to use.
+        lang (str): Language code for phonemization.
+        speed (float): Speaking speed.
+        batch_size (int): Number of chunks synthesized in one forward pass.
+        workers (int): Use the worker processes of the model if more than
+                       one.
+
+    Yields:
+        numpy array: 1D float audio of each chunk in order, or None for a
+                     chunk without any tokens.
+    """
+    batches = [
+        chunks[start: start + batch_size]
+        for start in range(0, len(chunks), batch_size)
+    ]
+    pool = kokoro.pool if workers > 1 and len(batches) > 1 else None
+    if workers > 1 and kokoro.pool is None:
+        logger.warning("The TTS model has no workers, synthesizing in-process")
+
+    if pool is not None:
+        # Workers hold the default voice, other voices go with the batches
+        for audios in pool.map(
+            batches,
+            lang=lang,
+            speed=speed,
+            voicepack=None if voicepack is kokoro.voicepack else voicepack,
+        ):
+            yield from audios
+        return
+
+    for batch in batches:
+        results = generate_batch(
+            kokoro.model,
+            [chunk.text for chunk in batch],
+            voicepack,
+            lang=lang,
+            speed=speed,
+            ps_list=[chunk.phonemes for chunk in batch],
+        )
+        for result in results:
+            yield result[0] if result else None
+
+
+def stream_audio(
+    texts,
+    lang: str = "a",
+    kokoro: KokoroVoiceModel = None,
+    batch_size: int = BATCH_SIZE,
+    workers: int = WORKERS,
+    voice: str = None,
+    speed: float = 1,
+    use_cache: bool = True,
+):
+    """
+    Synthesizes text and yields the audio chunk by chunk, in order, as soon
+    as each batch of chunks is synthesized.
+
+    Args:
+        texts (str): The input text to convert to speech.
+        lang (str): Language code for phonemization.
+        kokoro (KokoroVoiceModel): Model to use, the shared default model
+                                   is used if not given.
+        batch_size (int): Number of chunks synthesized in one forward pass.
+        workers (int): Whether batches are synthesized in parallel on the
+                       worker processes of the model, if more than one.
+                       The model must have been created with workers.
+        voice (str): Name of the voice, the model's default voice if not
+                     given.
+        speed (float): Speaking speed.
+        use_cache (bool): Whether to reuse the stored audio of recurring
+                          sentences and store the new ones. Needs
+                          tts_audio_cache_dir to be configured.
+
+    Yields:
+        numpy array: 1D float audio of one text chunk.
+    """
+    kokoro = kokoro or get_voice_model()
+    voicepack = kokoro.get_voicepack(voice)
+    cache = _audio_cache if use_cache else None
+    voice_name = voice or kokoro.voice_name
+
+    def piece_key(piece):
+        return cache.key(
+            piece.phonemes, voice_name, speed, kokoro.model_version
+        )
+
+    def recurring(piece):
+        return cache.recurring(piece_key(piece))
+
+    # Packed chunks mix a script's own narration with any boilerplate and
+    # are never spoken again, so only recurring pieces are synthesized on
+    # their own and cached
+    standalone = recurring if cache else None
+
+    chunks = []
+    for text in texts.split("\n"):
+        text = text.strip()
+        if not text:
+            continue
+        chunks.extend(ChunkPlan.from_text(text, lang, standalone=standalone))
+    for chunk in chunks:
+        logger.info(
+            f"Processing chunk: {chunk.text[:50]}..."
+        )  # Show the first 50 characters of the chunk
+
+    keys = [
+        piece_key(chunk) if cache and chunk.standalone else None
+        for chunk in chunks
+    ]
+    cached = [key is not None and key in cache for key in keys]
+    if any(cached):
+        logger.info(f"{sum(cached)} of {len(chunks)} chunks found in cache")
+
+    # Only the chunks missing from the cache are synthesized
+    synthesized = synthesize_chunks(
+        kokoro,
+        [chunk for chunk, hit in zip(chunks, cached) if not hit],
+        voicepack,
+        lang,
+        speed,
+        batch_size,
+        workers,
+    )
+    for chunk, key, hit in zip(chunks, keys, cached):
+        audio = cache.load(key) if hit else None
+        if audio is None:
+            if hit:
+                # Unreadable cache entry, synthesize the chunk again
+                audio = next(
+                    synthesize_chunks(kokoro, [chunk], voicepack, lang, speed)
+                )
+            else:
+                audio = next(synthesized)
+            if audio is not None and key is not None:
+                cache.save(key, audio)
+        if audio is not None:
+            yield audio
+
+
 def generate_audio(
     texts,
     save_audio: bool = False,
     lang: str = "a",
     output_file: str = "output.wav",
+    kokoro: KokoroVoiceModel = None,
+    batch_size: int = BATCH_SIZE,
+    workers: int = WORKERS,
+    voice: str = None,
+    use_cache: bool = True,
 ):
     """
     Main function to initialize the Kokoro model, process text, generate audio,
-    and save the output.
+    and save the output. Audio is written to the file while it is generated.
 
     Args:
         texts (str): The input text to convert to speech.
         save_audio (bool): Whether to save the generated audio to a file.
         lang (str): Language code for phonemization.
         output_file (str): The output .wav file name.
+        kokoro (KokoroVoiceModel): Model to use, the shared default model
+                                   is used if not given.
+        batch_size (int): Number of chunks synthesized in one forward pass.
+        workers (int): Number of synthesis processes, see stream_audio.
+        voice (str): Name of the voice, the model's default voice if not
+                     given.
+        use_cache (bool): Whether to use the audio cache, see
+                          stream_audio.
     """
+    writer = WavStreamWriter(output_file) if save_audio else None
     try:
-        kokoro = KokoroVoiceModel()
-        all_audio = []
-
-        for text in texts.split("\n"):
-            text = text.strip()
-            if not text:
-                continue
-
-            chunks = process_text_chunks(text)
-            for chunk in chunks:
-                logger.info(
-                    f"Processing chunk: {chunk[:50]}..."
-                )  # Show the first 50 characters of the chunk
-                audio, _ = generate(
-                    kokoro.model, chunk, kokoro.voicepack, lang=lang
-                )
-                all_audio.append(audio)
-
-        all_audio = np.concatenate(all_audio)
+        for audio in stream_audio(
+            texts,
+            lang,
+            kokoro,
+            batch_size,
+            workers,
+            voice,
+            use_cache=use_cache,
+        ):
+            if writer:
+                writer.write(audio)
         logger.info("Audio generation complete.")
 
-        if save_audio:
-            normalized_audio = normalize_audio(all_audio)
-            save_audio_output(normalized_audio, output_file)
+        if writer:
+            writer.close()
             logger.info(f"Audio saved as {output_file}")
 
     except Exception as e:
+        if writer:
+            writer.abort()
         logger.error(f"An error occurred during audio generation: {e}")
         raise
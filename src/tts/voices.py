@@ -0,0 +1,155 @@
+import os
+import glob
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+import torch
+
+logger = logging.getLogger()
+
+VOICE_CACHE_SIZE = 8
+
+
+def voice_store_path(voicepack_path):
+    return f"{os.path.splitext(voicepack_path)[0]}.npy"
+
+
+def convert_voicepack(voicepack_path):
+    """
+    Converts a `.pt` voice pack into a `.npy` store next to it, which can be
+    memory-mapped. The conversion is skipped while the store is newer than
+    the voice pack.
+
+    Args:
+        voicepack_path (str): Path to the `.pt` voice pack.
+
+    Returns:
+        str: Path of the `.npy` store.
+    """
+    store_path = voice_store_path(voicepack_path)
+    if os.path.exists(store_path) and os.path.getmtime(
+        store_path
+    ) >= os.path.getmtime(voicepack_path):
+        return store_path
+
+    voicepack = torch.load(voicepack_path, weights_only=True)
+    tmp_path = f"{store_path}.tmp.npy"
+    np.save(tmp_path, voicepack.float().numpy())
+    os.replace(tmp_path, store_path)
+    logger.info(f"Converted voice pack {voicepack_path} to {store_path}")
+    return store_path
+
+
+class MappedVoicepack:
+    """
+    Memory-mapped voice pack. Only the style vectors that are indexed are
+    read from disk, and the pages are shared by every process mapping the
+    same file.
+    """
+
+    def __init__(self, store_path, device="cpu"):
+        """
+        Args:
+            store_path (str): Path to the `.npy` store.
+            device (str): Device the indexed style vectors are moved to.
+        """
+        self.store_path = store_path
+        self.device = device
+        self.array = np.load(store_path, mmap_mode="r")
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, index):
+        return torch.from_numpy(np.array(self.array[index])).to(self.device)
+
+    def share_memory_(self):
+        # The mapped file is already shared between processes
+        return self
+
+    def __reduce__(self):
+        return MappedVoicepack, (self.store_path, self.device)
+
+
+class VoiceRegistry:
+    """
+    Voice packs found in a voices folder, opened on first use and kept in
+    an LRU of recently used voices.
+
+    On CPU the voices are memory-mapped from `.npy` stores, converted once
+    from the `.pt` voice packs. On other devices the whole voice pack is
+    copied to the device when it enters the LRU.
+    """
+
+    def __init__(self, voices_dir, device="cpu", cache_size=VOICE_CACHE_SIZE):
+        """
+        Args:
+            voices_dir (str): Directory where voice packs are stored.
+            device (str): Device the voices are used on.
+            cache_size (int): Number of voices kept open.
+        """
+        self.voices_dir = voices_dir
+        self.device = device
+        self.cache_size = cache_size
+        self._voices = OrderedDict()
+        self._lock = threading.Lock()
+
+    def names(self):
+        """
+        Returns the names of the voices in the voices folder.
+
+        Returns:
+            list: Sorted voice names.
+        """
+        paths = glob.glob(os.path.join(self.voices_dir, "*.pt")) + glob.glob(
+            os.path.join(self.voices_dir, "*.npy")
+        )
+        names = {os.path.splitext(os.path.basename(p))[0] for p in paths}
+        return sorted(names)
+
+    def get(self, name):
+        """
+        Returns a voice pack, opening it if it is not in the LRU.
+
+        Args:
+            name (str): Name of the voice, e.g. "af_sarah".
+
+        Returns:
+            MappedVoicepack or torch.Tensor: The voice pack, indexed by token
+                                             count.
+        """
+        with self._lock:
+            if name in self._voices:
+                self._voices.move_to_end(name)
+                return self._voices[name]
+
+            voicepack = self._open(name)
+            self._voices[name] = voicepack
+            if len(self._voices) > self.cache_size:
+                self._voices.popitem(last=False)
+            return voicepack
+
+    def _open(self, name):
+        voicepack_path = os.path.join(self.voices_dir, f"{name}.pt")
+        store_path = voice_store_path(voicepack_path)
+        if os.path.exists(voicepack_path):
+            try:
+                store_path = convert_voicepack(voicepack_path)
+            except OSError as e:
+                logger.warning(f"Could not convert voice pack {name}: {e}")
+                return torch.load(voicepack_path, weights_only=True).to(
+                    self.device
+                )
+        elif not os.path.exists(store_path):
+            raise ValueError(f"Unknown voice: {name}")
+
+        logger.info(f"Opening voice pack {store_path}...")
+        voicepack = MappedVoicepack(store_path)
+        if self.device == "cpu":
+            return voicepack
+        return torch.from_numpy(np.array(voicepack.array)).to(self.device)